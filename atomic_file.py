@@ -0,0 +1,82 @@
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+
+# Suffix of the last good snapshot kept next to each atomically written file
+BACKUP_SUFFIX = '.bak'
+
+
+def backup_path(path):
+    """Return the path of the last good snapshot of path."""
+    return path + BACKUP_SUFFIX
+
+
+def _fsync_directory(directory):
+    """Make a rename inside directory durable (not supported on every platform)."""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+@contextmanager
+def atomic_write(path, mode='w', backup=True):
+    """
+    Open a temporary file next to path for writing and, once the block
+    completes, fsync it and rename it over path. A crash or error at any
+    point leaves the previous version of path untouched.
+    With backup=True the previous version is kept as path + '.bak'.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix='.tmp')
+
+    try:
+        with os.fdopen(fd, mode) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+
+        if os.path.exists(path):
+            shutil.copymode(path, tmp_path)
+            if backup:
+                shutil.copy2(path, tmp_path + BACKUP_SUFFIX)
+                os.replace(tmp_path + BACKUP_SUFFIX, backup_path(path))
+        else:
+            # mkstemp creates files readable by the owner only
+            umask = os.umask(0)
+            os.umask(umask)
+            os.chmod(tmp_path, 0o666 & ~umask)
+
+        os.replace(tmp_path, path)
+        _fsync_directory(directory)
+    except BaseException:
+        for leftover in (tmp_path, tmp_path + BACKUP_SUFFIX):
+            if os.path.exists(leftover):
+                os.remove(leftover)
+        raise
+
+
+def read_with_recovery(path, reader, errors=(ValueError,)):
+    """
+    Return reader(path). If that raises one of `errors` (e.g. a truncated
+    file) and a last good snapshot exists, restore path from the snapshot
+    and return reader(snapshot) instead; otherwise re-raise.
+    """
+    try:
+        return reader(path)
+    except errors:
+        snapshot = backup_path(path)
+        if not os.path.exists(snapshot):
+            raise
+        data = reader(snapshot)
+        print(f"Warning: Could not parse {path}, recovered last good snapshot {snapshot}")
+        with atomic_write(path, 'wb', backup=False) as f, open(snapshot, 'rb') as src:
+            shutil.copyfileobj(src, f)
+        return data
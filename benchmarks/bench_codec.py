@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Benchmark the JSON codecs on a synthetic event database.
+
+Builds a {"events": [...]} document with N events (default 100,000),
+checks that every codec's compatibility-mode output is byte-identical to
+json.dump(..., indent=2), then times loading and saving.
+
+Usage: python benchmarks/bench_codec.py [events]
+"""
+
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from json_codecs import available_codecs, get_codec
+
+CITIES = ['Malmö', 'Amsterdam', 'Melbourne', 'São Paulo', 'Zürich', 'New York', 'Kraków', 'Bratislava']
+
+
+def synthetic_events(count):
+    rng = random.Random(42)
+    events = []
+    for i in range(count):
+        city = rng.choice(CITIES)
+        year = 2015 + i % 12
+        events.append({
+            'id': f"{city.lower().replace(' ', '-')}-{year}-{i}",
+            'city': city,
+            'url': f"https://{city.lower().replace(' ', '')}.measurecamp.org/",
+            'date': f"{year}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            'time': rng.choice(['09:00', '9:00', '08:30']),
+            'venue': rng.choice([None, f"{city} Venue {i}"]),
+            'address': f"Street {i}, {city}",
+            'last_updated': f"2025-12-11T19:56:{i % 60:02d}.261179Z",
+        })
+    return events
+
+
+def timed(func, rounds=3):
+    best = None
+    for _ in range(rounds):
+        started = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    events = synthetic_events(count)
+    reference = json.dumps({'events': events}, indent=2).encode('ascii')
+    print(f"{count} events, {len(reference) / 1024 / 1024:.1f} MiB")
+
+    baseline = None
+    for name in reversed(available_codecs()):
+        codec = get_codec(name)
+
+        load_time, loaded = timed(lambda: codec.decode_events(reference))
+        save_time, saved = timed(lambda: codec.encode_events(events))
+        fast_time, _ = timed(lambda: codec.encode_events(events, compat=False))
+
+        if saved != reference or loaded != events:
+            print(f"{name:8} MISMATCH with stdlib json output")
+            continue
+
+        baseline = baseline or (load_time, save_time)
+        print(f"{name:8} load {load_time * 1000:7.1f} ms ({baseline[0] / load_time:4.1f}x)  "
+              f"save {save_time * 1000:7.1f} ms ({baseline[1] / save_time:4.1f}x)  "
+              f"save non-compat {fast_time * 1000:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
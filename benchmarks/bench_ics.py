@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Check and benchmark the fast path VEVENT serializer.
+
+Conformance: every event of events.json and N synthetic events (default
+10,000) with commas, semicolons, backslashes, newlines, carets, non-ASCII
+text and long values (to exercise escaping and folding) must serialize
+to exactly the bytes icalendar produces, event by event and as a whole
+calendar. Then times icalendar vs the fast path on N realistic events
+(events.json repeated).
+
+Usage: python benchmarks/bench_ics.py [events]
+"""
+
+import io
+import random
+import sys
+import time
+from datetime import date, time as clock
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from event_record import EventRecord
+from event_store import read_events_json
+from ics_generator import BuildContext, ICSGenerator
+
+ROOT = Path(__file__).resolve().parent.parent
+
+PIECES = ['Malmö', 'São Paulo', 'Kraków', 'New York', 'a,b', 'x;y', 'back\\slash', '\\N', 'line\nbreak',
+          'cr\r\nlf', 'lone\rcr', '^caret', 'quote"s', 'colon:value', '🎉', 'Straße', 'Google\xa0Melbourne']
+
+
+def tricky_text(rng):
+    words = [rng.choice(PIECES) for _ in range(rng.randint(1, 12))]
+    return ' '.join(words) + rng.choice(['', '\\', '^', ' ' * rng.randint(1, 80)])
+
+
+def synthetic_events(count):
+    rng = random.Random(42)
+    events = []
+    for i in range(count):
+        city = tricky_text(rng)
+        events.append(EventRecord(
+            id=f"{city.lower()}-{i}",
+            city=city,
+            url=f"https://example{i}.measurecamp.org/{'p' * rng.randint(0, 90)}",
+            date=date(2015 + i % 12, rng.randint(1, 12), rng.randint(1, 28)),
+            time=rng.choice([clock(9, 0), clock(8, 30), None]),
+            venue=rng.choice([tricky_text(rng), 'x' * rng.randint(60, 160), None]),
+            address=f"Street {i}",
+            last_updated=rng.choice([f"2025-12-11T19:56:{i % 60:02d}.261179Z", None]),
+            sequence=rng.randint(0, 3),
+        ))
+    return events
+
+
+def timed(func, rounds=3):
+    best = None
+    for _ in range(rounds):
+        started = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def check_conformance(generator, context):
+    mismatches = 0
+    fallbacks = 0
+    for event_data in generator.events:
+        fast = generator.serialize_event(event_data, context)
+        if fast is None:
+            fallbacks += 1
+            continue
+        if fast != generator.create_event(event_data, context).to_ical():
+            mismatches += 1
+            if mismatches <= 3:
+                print(f"MISMATCH for {event_data!r}")
+
+    stream = io.BytesIO()
+    generator.write_ics(stream, context)
+    calendar_ok = stream.getvalue() == generator.create_calendar(context).to_ical()
+    return mismatches, fallbacks, calendar_ok
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    context = BuildContext()
+
+    failed = False
+    for label, events in (('events.json', read_events_json(str(ROOT / 'events.json'))),
+                          ('synthetic', synthetic_events(count))):
+        generator = ICSGenerator(events=events)
+        mismatches, fallbacks, calendar_ok = check_conformance(generator, context)
+        failed = failed or mismatches or not calendar_ok
+        print(f"{label:12} {len(events)} events: {mismatches} mismatches, "
+              f"{fallbacks} left to icalendar, calendar {'identical' if calendar_ok else 'DIFFERS'}")
+
+    # Timing on realistic events: events.json repeated to `count` events
+    stored = read_events_json(str(ROOT / 'events.json'))
+    events = (stored * (count // len(stored) + 1))[:count]
+    generator = ICSGenerator(events=events)
+    slow_time, _ = timed(lambda: [generator.create_event(event_data, context).to_ical() for event_data in events])
+    fast_time, _ = timed(lambda: [generator.serialize_event(event_data, context) for event_data in events])
+    print(f"{len(events)} VEVENTs: icalendar {slow_time * 1000:7.1f} ms, "
+          f"fast path {fast_time * 1000:7.1f} ms ({slow_time / fast_time:4.1f}x)")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Benchmark the HTML parser backends on the saved fixture pages.
+
+Checks that every available backend extracts exactly the same data as
+a full-tree BeautifulSoup + html.parser parse, then times calendar and
+event page parsing and measures peak memory per round. BeautifulSoup
+backends are measured both with partial (SoupStrainer) and full-tree
+parsing. The streaming calendar tokenizer is also checked to give the
+same links however the page is split into network chunks.
+
+Usage: python benchmarks/bench_parsers.py [rounds]
+"""
+
+import codecs
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from parser_backends import CalendarLinkParser, available_backends, get_backend
+from scraper import calendar_link_to_event, parse_calendar_page, parse_event_details
+
+FIXTURES = Path(__file__).resolve().parent / 'fixtures'
+
+
+def parse_all(backend, calendar_page, event_pages):
+    links = parse_calendar_page(calendar_page, backend)
+    details = [parse_event_details(content, name, backend) for name, content in event_pages]
+    return links, details
+
+
+def stream_calendar(chunks):
+    """Parse calendar page chunks the way scraper.iter_calendar_events does."""
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+    parser = CalendarLinkParser()
+    for chunk in chunks:
+        parser.feed(decoder.decode(chunk))
+    parser.feed(decoder.decode(b'', final=True))
+    parser.close()
+    return [event for event in (calendar_link_to_event(href, text) for href, text in parser.pop_links()) if event]
+
+
+def check_chunked_calendar(calendar_page, reference, random_splits=200):
+    """
+    Return the number of chunkings whose streamed links differ from reference:
+    a split at every byte offset of the event list, plus random multi-way splits.
+    """
+    first = calendar_page.index(b'class="calevent"')
+    last = calendar_page.rindex(b'class="calevent"')
+    last = calendar_page.index(b'</li>', last) + len(b'</li>')
+    chunkings = [[calendar_page[:offset], calendar_page[offset:]] for offset in range(first, last + 1)]
+
+    rng = random.Random(42)
+    for _ in range(random_splits):
+        offsets = sorted(rng.sample(range(1, len(calendar_page)), rng.randint(2, 64)))
+        bounds = [0] + offsets + [len(calendar_page)]
+        chunkings.append([calendar_page[start:end] for start, end in zip(bounds, bounds[1:])])
+
+    return sum(1 for chunks in chunkings if stream_calendar(chunks) != reference), len(chunkings)
+
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+
+    calendar_page = (FIXTURES / 'calendar.html').read_bytes()
+    event_pages = [(path.name, path.read_bytes()) for path in sorted(FIXTURES.glob('event-*.html'))]
+
+    reference = parse_all(get_backend('html.parser', partial=False), calendar_page, event_pages)
+    backends = []
+    for name in reversed(available_backends()):
+        if name != 'selectolax':
+            backends.append(get_backend(name, partial=False))
+        backends.append(get_backend(name))
+
+    mismatches, chunkings = check_chunked_calendar(calendar_page, reference[0])
+    print(f"Streaming calendar tokenizer: {mismatches} mismatches in {chunkings} chunkings")
+
+    baseline = None
+
+    print(f"{len(event_pages)} event pages + calendar page, {rounds} rounds")
+    for backend in backends:
+        tracemalloc.start()
+        results = parse_all(backend, calendar_page, event_pages)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        if results != reference:
+            print(f"{backend.name:24} MISMATCH with html.parser results")
+            continue
+
+        started = time.perf_counter()
+        for _ in range(rounds):
+            parse_all(backend, calendar_page, event_pages)
+        elapsed = (time.perf_counter() - started) / rounds
+
+        baseline = baseline or elapsed
+        print(f"{backend.name:24} {elapsed * 1000:8.2f} ms/round  {baseline / elapsed:5.1f}x  peak {peak / 1024:8.0f} KiB")
+
+    return 1 if mismatches else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Check and time the scraping pipeline against a local server.
+
+Serves a calendar page whose N event links (default QUEUE_SIZE +
+MAX_CONNECTIONS + 20) all live on the calendar's own host, with
+fixtures/event-malmo.html as every event page. The calendar's stream and
+the event fetches then compete for the same host, which must not stall
+the pipeline: every link has to be scraped, in calendar order, within
+the timeout.
+
+Usage: python benchmarks/bench_pipeline.py [links]
+"""
+
+import asyncio
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from aiohttp import web
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import scraper
+from event_manager import EventManager
+from http_client import MAX_CONNECTIONS
+from pipeline import QUEUE_SIZE, run_pipeline
+
+FIXTURES = Path(__file__).resolve().parent / 'fixtures'
+TIMEOUT = 120              # Seconds before the pipeline counts as hung
+
+
+def calendar_page(base, count):
+    # 'measurecamp.org' in the path lets the same-host links pass the calendar link filter
+    links = ''.join(f'<li class="calevent"><a href="{base}/measurecamp.org/city{i}/">17th Jan &ndash; City {i}</a></li>\n'
+                    for i in range(count))
+    return f'<html><body><div class="pagecontents"><ul>\n{links}</ul></div></body></html>'
+
+
+async def serve(count):
+    event_page = (FIXTURES / 'event-malmo.html').read_bytes()
+
+    async def handler(request):
+        if request.path == '/measurecamp-calendar/':
+            base = f'http://{request.host}'
+            return web.Response(text=calendar_page(base, count), content_type='text/html')
+        return web.Response(body=event_page, content_type='text/html')
+
+    app = web.Application()
+    app.router.add_get('/{tail:.*}', handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, '127.0.0.1', 0).start()
+    port = runner.addresses[0][1]
+    return runner, f'http://127.0.0.1:{port}'
+
+
+async def check_pipeline(count):
+    runner, base = await serve(count)
+    scraper.CALENDAR_URL = f'{base}/measurecamp-calendar/'
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            manager = EventManager(str(Path(tmp) / 'events.json'))
+            started = time.perf_counter()
+            try:
+                scraped, _ = await asyncio.wait_for(run_pipeline(manager, cache_file=None), TIMEOUT)
+            except asyncio.TimeoutError:
+                print(f"HUNG: pipeline did not finish within {TIMEOUT}s")
+                return False
+            elapsed = time.perf_counter() - started
+            in_order = [event.city for event in manager.events] == [f'City {i}' for i in range(count)]
+    finally:
+        await runner.cleanup()
+
+    print(f"{count} same-host links: {scraped} scraped in {elapsed:.1f}s, "
+          f"calendar order {'kept' if in_order else 'LOST'}")
+    return scraped == count and in_order
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else QUEUE_SIZE + MAX_CONNECTIONS + 20
+    return 0 if asyncio.run(check_pipeline(count)) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
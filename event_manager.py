@@ -1,12 +1,29 @@
-import json
-import os
-from datetime import datetime
+from bisect import bisect_left, insort
+from datetime import datetime, timedelta
 from pathlib import Path
+from event_record import DATE_FORMAT, DEFAULT_TIME, EventRecord, parse_date, utc_timestamp
+from event_store import open_store
 
 class EventManager:
-    def __init__(self, events_file='events.json'):
+    def __init__(self, events_file='events.json', store=None):
+        """
+        events_file selects the storage backend (see event_store.open_store):
+        events.json by default, or an SQLite database for .db/.sqlite paths.
+        Pass `store` to use a specific backend instance instead.
+        """
         self.events_file = events_file
+        self.store = store or open_store(events_file)
+        # IDs of events added/updated since the last load or save
+        self._dirty_ids = set()
+        # EventRecords, in storage order
         self.events = []
+        # Indexes over self.events: id -> event, city/date -> {id: event}
+        self._by_id = {}
+        self._by_city = {}
+        self._by_date = {}
+        # Sorted (date, id) keys of dated events, and events without a usable date
+        self._date_keys = []
+        self._undated = {}
         self.load_events()
 
     def generate_event_id(self, city, date):
@@ -15,46 +32,163 @@ class EventManager:
         Example: amsterdam-2026
         """
         city_slug = city.lower().replace(' ', '-').replace("'", '')
-        year = date.split('-')[0] if date else 'unknown'
+        if not date:
+            year = 'unknown'
+        elif isinstance(date, str):
+            year = date.split('-')[0]
+        else:
+            year = date.year
         return f"{city_slug}-{year}"
 
     def load_events(self):
-        """Load existing events from JSON file."""
-        if os.path.exists(self.events_file):
-            try:
-                with open(self.events_file, 'r') as f:
-                    data = json.load(f)
-                    self.events = data.get('events', [])
-                    print(f"Loaded {len(self.events)} existing events from {self.events_file}")
-            except json.JSONDecodeError:
-                print(f"Warning: Could not parse {self.events_file}, starting fresh")
-                self.events = []
+        """Load existing events from the event store."""
+        self.events = self.store.load()
+        self._dirty_ids = set()
+        self._rebuild_indexes()
+
+    def _rebuild_indexes(self):
+        """Rebuild all indexes from self.events."""
+        self._by_id = {}
+        self._by_city = {}
+        self._by_date = {}
+        self._date_keys = []
+        self._undated = {}
+        for event in self.events:
+            # Keep the first event for a duplicated ID, like a linear scan would
+            if event.id not in self._by_id:
+                self._index_event(event, keep_sorted=False)
+        self._date_keys.sort()
+
+    def _sort_key(self, event):
+        """Return the (date, id) date-order key of an event, or None if it has no valid date."""
+        if event.date is None:
+            return None
+        return (event.date, event.id)
+
+    def _index_event(self, event, keep_sorted=True):
+        """Add an event to the indexes."""
+        event_id = event.id
+        self._by_id[event_id] = event
+        self._by_city.setdefault(event.city, {})[event_id] = event
+        self._by_date.setdefault(event.date, {})[event_id] = event
+
+        key = self._sort_key(event)
+        if key is None:
+            self._undated[event_id] = event
+        elif keep_sorted:
+            insort(self._date_keys, key)
+        else:
+            self._date_keys.append(key)
+
+    def _unindex_event(self, event):
+        """Remove an event from the indexes."""
+        event_id = event.id
+        self._by_id.pop(event_id, None)
+        for index, key in ((self._by_city, event.city), (self._by_date, event.date)):
+            bucket = index.get(key)
+            if bucket is not None:
+                bucket.pop(event_id, None)
+                if not bucket:
+                    del index[key]
+
+        sort_key = self._sort_key(event)
+        if sort_key is None:
+            self._undated.pop(event_id, None)
         else:
-            print(f"{self.events_file} not found, starting with empty event list")
-            self.events = []
+            position = bisect_left(self._date_keys, sort_key)
+            if position < len(self._date_keys) and self._date_keys[position] == sort_key:
+                del self._date_keys[position]
 
-    def save_events(self):
-        """Save events to JSON file."""
-        with open(self.events_file, 'w') as f:
-            json.dump({'events': self.events}, f, indent=2)
-        print(f"Saved {len(self.events)} events to {self.events_file}")
+    def has_changes(self):
+        """Whether events were added/updated since the last load or save."""
+        return bool(self._dirty_ids)
+
+    def save_events(self, force=False):
+        """
+        Save events to the event store (backends that support it write only changed events).
+        Nothing is written if no event changed since the last load or save, unless force is set.
+        Returns True if the store was written.
+        """
+        if not self._dirty_ids and not force:
+            print(f"No changes, skipping write of {self.events_file}")
+            return False
+
+        self.store.save(self.events, None if force else self._dirty_ids)
+        self._dirty_ids = set()
+        return True
 
     def find_event(self, event_id):
         """Find an event by ID in the stored events."""
-        for event in self.events:
-            if event.get('id') == event_id:
-                return event
-        return None
+        return self._by_id.get(event_id)
 
-    def is_past_event(self, date_str):
-        """Check if an event date is in the past."""
-        if not date_str:
-            return False
-        try:
-            event_date = datetime.strptime(date_str, '%Y-%m-%d')
-            return event_date < datetime.now()
-        except ValueError:
+    def find_events_by_city(self, city):
+        """Return all stored events for a city."""
+        return list(self._by_city.get(city, {}).values())
+
+    def find_events_by_date(self, event_date):
+        """Return all stored events on a date (date or YYYY-MM-DD)."""
+        return list(self._by_date.get(parse_date(event_date), {}).values())
+
+    def is_past_event(self, event_date, now=None):
+        """
+        Check if an event date is in the past (an event's day counts as past
+        once it has started). Pass the record's parsed date to avoid parsing.
+        """
+        event_date = parse_date(event_date)
+        if event_date is None:
             return False
+        return event_date <= (now or datetime.now()).date()
+
+    def merge_event(self, scraped_event):
+        """
+        Merge a single scraped event (EventRecord or dict) into the stored events.
+        Updates the stored event if anything changed, or adds it if new.
+        A real change bumps the event's sequence and last_updated, which
+        become its SEQUENCE and LAST-MODIFIED in the calendar.
+        Returns the event ID if it was added/updated, None otherwise.
+        """
+        scraped_event = EventRecord.coerce(scraped_event)
+        event_id = self.generate_event_id(scraped_event.city, scraped_event.date)
+
+        stored_event = self.find_event(event_id)
+
+        # Prepare new event data
+        new_event_data = EventRecord(
+            id=event_id,
+            city=scraped_event.city,
+            url=scraped_event.url,
+            date=scraped_event.date,
+            time=scraped_event.time or DEFAULT_TIME,
+            venue=scraped_event.venue,
+            address=scraped_event.address,
+            last_updated=utc_timestamp()
+        )
+
+        if stored_event:
+            # Check if anything changed
+            changed = False
+            for key in ['date', 'time', 'venue', 'address', 'url']:
+                if getattr(stored_event, key) != getattr(new_event_data, key):
+                    changed = True
+                    break
+
+            if changed:
+                print(f"Updating event: {event_id}")
+                new_event_data.sequence = stored_event.sequence + 1
+                self._unindex_event(stored_event)
+                stored_event.update(new_event_data)
+                self._index_event(stored_event)
+                self._dirty_ids.add(event_id)
+                return event_id
+        else:
+            # New event
+            print(f"Adding new event: {event_id}")
+            self.events.append(new_event_data)
+            self._index_event(new_event_data)
+            self._dirty_ids.add(event_id)
+            return event_id
+
+        return None
 
     def update_events(self, scraped_events):
         """
@@ -64,53 +198,19 @@ class EventManager:
         """
         changed_ids = []
 
-        # Create a set of IDs from scraped events for quick lookup
-        scraped_ids = set()
-
         for scraped_event in scraped_events:
-            event_id = self.generate_event_id(scraped_event['city'], scraped_event['date'])
-            scraped_ids.add(event_id)
-
-            stored_event = self.find_event(event_id)
-
-            # Prepare new event data
-            new_event_data = {
-                'id': event_id,
-                'city': scraped_event['city'],
-                'url': scraped_event['url'],
-                'date': scraped_event['date'],
-                'time': scraped_event.get('time', '09:00'),
-                'venue': scraped_event.get('venue'),
-                'address': scraped_event.get('address'),
-                'last_updated': datetime.now().isoformat() + 'Z'
-            }
-
-            if stored_event:
-                # Check if anything changed
-                changed = False
-                for key in ['date', 'time', 'venue', 'address', 'url']:
-                    if stored_event.get(key) != new_event_data[key]:
-                        changed = True
-                        break
-
-                if changed:
-                    print(f"Updating event: {event_id}")
-                    stored_event.update(new_event_data)
-                    changed_ids.append(event_id)
-            else:
-                # New event
-                print(f"Adding new event: {event_id}")
-                self.events.append(new_event_data)
+            event_id = self.merge_event(scraped_event)
+            if event_id:
                 changed_ids.append(event_id)
 
         # Remove past events (optional - comment out if you want to keep history)
         # past_event_ids = []
         # for event in self.events:
-        #     if self.is_past_event(event.get('date')):
-        #         past_event_ids.append(event.get('id'))
+        #     if self.is_past_event(event.date):
+        #         past_event_ids.append(event.id)
         #
         # for past_id in past_event_ids:
-        #     self.events = [e for e in self.events if e.get('id') != past_id]
+        #     self.events = [e for e in self.events if e.id != past_id]
         #     print(f"Removing past event: {past_id}")
 
         return changed_ids
@@ -119,9 +219,39 @@ class EventManager:
         """Return all stored events."""
         return self.events
 
+    def _as_date(self, value):
+        """Normalise a date, datetime or YYYY-MM-DD string to a date."""
+        if isinstance(value, str):
+            return datetime.strptime(value, DATE_FORMAT).date()
+        return parse_date(value)
+
+    def events_between(self, start=None, end=None):
+        """
+        Return events with start <= date < end, sorted by date.
+        start/end may be dates, datetimes or YYYY-MM-DD strings; None means unbounded.
+        Events without a valid date are not included.
+        """
+        lo = 0 if start is None else bisect_left(self._date_keys, (self._as_date(start),))
+        hi = len(self._date_keys) if end is None else bisect_left(self._date_keys, (self._as_date(end),))
+        return [self._by_id[event_id] for _, event_id in self._date_keys[lo:hi]]
+
+    def future_events(self, now=None):
+        """
+        Return events that are not in the past at `now` (default: current time),
+        sorted by date, followed by events without a valid date.
+        An event counts as past from the start of its day, as in is_past_event.
+        """
+        today = (now or datetime.now()).date()
+        return self.events_between(start=today + timedelta(days=1)) + list(self._undated.values())
+
+    def upcoming_events(self, days=30, now=None):
+        """Return future events within the next `days` days, sorted by date."""
+        today = (now or datetime.now()).date()
+        return self.events_between(start=today + timedelta(days=1), end=today + timedelta(days=days + 1))
+
     def get_future_events(self):
         """Return only future events."""
-        return [e for e in self.events if not self.is_past_event(e.get('date'))]
+        return self.future_events()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,136 @@
+import datetime as dt
+from dataclasses import dataclass, field, fields
+from datetime import date, datetime, time
+from zoneinfo import ZoneInfo
+
+DATE_FORMAT = '%Y-%m-%d'
+TIME_FORMAT = '%H:%M'
+DEFAULT_TIME = time(9, 0)        # Start time used when an event page gives none
+UTC = ZoneInfo('UTC')            # Event times are published as UTC
+
+
+def parse_date(value):
+    """Parse a YYYY-MM-DD string (or pass through a date); None if missing or invalid."""
+    if value is None or isinstance(value, date):
+        return value.date() if isinstance(value, datetime) else value
+    try:
+        return datetime.strptime(value, DATE_FORMAT).date()
+    except ValueError:
+        return None
+
+
+def parse_timestamp(value):
+    """
+    Parse a last_updated ISO timestamp ('...Z', UTC) into an aware
+    datetime; None if missing or invalid.
+    """
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.removesuffix('Z')).replace(tzinfo=UTC)
+    except ValueError:
+        return None
+
+
+def utc_timestamp(now=None):
+    """Return a last_updated timestamp for now (default: current time) in UTC."""
+    now = (now or datetime.now(UTC)).astimezone(UTC)
+    return now.replace(tzinfo=None).isoformat() + 'Z'
+
+
+def parse_time(value):
+    """Parse an H:MM / HH:MM string (or pass through a time); None if missing or invalid."""
+    if value is None or isinstance(value, time):
+        return value
+    try:
+        return datetime.strptime(value, TIME_FORMAT).time()
+    except ValueError:
+        return None
+
+
+@dataclass(slots=True)
+class EventRecord:
+    """
+    A single MeasureCamp event.
+    date and time are parsed values; they are converted from/to the
+    'YYYY-MM-DD' / 'HH:MM' strings of events.json by from_dict/to_dict.
+    `sequence` counts the real changes of the event since it was added.
+    `start` (the UTC start datetime) and `updated_at` (last_updated as a
+    UTC datetime) are derived once when the record is created; change
+    fields through update() to keep them in step.
+    """
+
+    id: str = None
+    city: str = None
+    url: str = None
+    # Field names shadow the datetime types inside the class body, hence dt.
+    date: dt.date = None
+    time: dt.time = None
+    venue: str = None
+    address: str = None
+    last_updated: str = None
+    sequence: int = 0
+    start: dt.datetime = field(default=None, init=False, repr=False, compare=False)
+    updated_at: dt.datetime = field(default=None, init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        self.start = self._start()
+        self.updated_at = parse_timestamp(self.last_updated)
+
+    def _start(self):
+        if self.date is None:
+            return None
+        return datetime.combine(self.date, self.time or DEFAULT_TIME, tzinfo=UTC)
+
+    @classmethod
+    def from_dict(cls, data):
+        """Build a record from a stored/scraped event dict (unknown keys are ignored)."""
+        return cls(
+            id=data.get('id'),
+            city=data.get('city'),
+            url=data.get('url'),
+            date=parse_date(data.get('date')),
+            time=parse_time(data.get('time')),
+            venue=data.get('venue'),
+            address=data.get('address'),
+            last_updated=data.get('last_updated'),
+            sequence=data.get('sequence') or 0,
+        )
+
+    @classmethod
+    def coerce(cls, event):
+        """Return event as an EventRecord (accepts records and dicts)."""
+        return event if isinstance(event, cls) else cls.from_dict(event)
+
+    def update(self, other):
+        """Copy all stored fields (and the derived values) from another record."""
+        for name in EVENT_FIELDS:
+            setattr(self, name, getattr(other, name))
+        self.start = other.start
+        self.updated_at = other.updated_at
+
+    @property
+    def date_str(self):
+        return self.date.strftime(DATE_FORMAT) if self.date else None
+
+    @property
+    def time_str(self):
+        return self.time.strftime(TIME_FORMAT) if self.time else None
+
+    def to_dict(self):
+        """Return the event as a dict of strings, in events.json field order."""
+        return {
+            'id': self.id,
+            'city': self.city,
+            'url': self.url,
+            'date': self.date_str,
+            'time': self.time_str,
+            'venue': self.venue,
+            'address': self.address,
+            'last_updated': self.last_updated,
+            'sequence': self.sequence,
+        }
+
+
+# Stored field names, in events.json order
+EVENT_FIELDS = tuple(f.name for f in fields(EventRecord) if f.init)
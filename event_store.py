@@ -0,0 +1,241 @@
+import json
+import os
+import sqlite3
+
+from atomic_file import atomic_write, read_with_recovery
+from event_record import EVENT_FIELDS, EventRecord
+from json_codecs import DEFAULT_CODEC
+
+SQLITE_EXTENSIONS = ('.db', '.sqlite', '.sqlite3')
+SQLITE_TYPES = {'sequence': 'INTEGER'}     # Column types other than TEXT
+
+# Journal entries after which events.json is rewritten and the journal dropped
+COMPACT_THRESHOLD = 200
+
+
+def read_events_json(path, codec=None):
+    """
+    Read the events of a JSON database file as EventRecords, falling back
+    to its last good snapshot if the file is damaged. Raises
+    json.JSONDecodeError. `codec` is a json_codecs codec (default: fastest
+    available).
+    """
+    codec = codec or DEFAULT_CODEC
+
+    def read(file_path):
+        with open(file_path, 'rb') as f:
+            return codec.decode_events(f.read())
+
+    return [EventRecord.from_dict(event) for event in read_with_recovery(path, read)]
+
+
+def write_events_json(path, events, codec=None):
+    """
+    Atomically write EventRecords to a JSON database file, byte-for-byte
+    as json.dump(..., indent=2) would. `codec` is a json_codecs codec.
+    """
+    codec = codec or DEFAULT_CODEC
+    data = codec.encode_events([event.to_dict() for event in events])
+    with atomic_write(path, 'wb') as f:
+        f.write(data)
+
+
+class JSONEventStore:
+    """
+    Stores all events in a single JSON file (events.json).
+    With journal=True, saves append only the changed events as JSON lines
+    to `<path>.journal`, which is replayed on load and compacted into the
+    JSON file once it holds `compact_threshold` entries. Without a journal
+    every save rewrites the file.
+    """
+
+    def __init__(self, path='events.json', journal=False, compact_threshold=COMPACT_THRESHOLD):
+        self.path = path
+        self.journal_path = f"{path}.journal" if journal else None
+        self.compact_threshold = compact_threshold
+        self._journal_entries = 0
+
+    def load(self):
+        """Return all stored events as EventRecords."""
+        if not os.path.exists(self.path):
+            print(f"{self.path} not found, starting with empty event list")
+            events = []
+        else:
+            try:
+                events = read_events_json(self.path)
+                print(f"Loaded {len(events)} existing events from {self.path}")
+            except json.JSONDecodeError:
+                print(f"Warning: Could not parse {self.path}, starting fresh")
+                events = []
+
+        if self.journal_path:
+            events = self._replay_journal(events)
+        return events
+
+    def _replay_journal(self, events):
+        """
+        Apply the journal's event records on top of events. A damaged
+        journal (a torn line from an interrupted append) is compacted right
+        away, so later appends do not land behind the damaged line.
+        """
+        self._journal_entries = 0
+        if not os.path.exists(self.journal_path):
+            return events
+
+        positions = {event.id: i for i, event in enumerate(events)}
+        damaged = False
+        with open(self.journal_path, 'rb') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                # Without its newline, the next append would run into this line
+                damaged = damaged or not line.endswith(b'\n')
+                try:
+                    event = EventRecord.from_dict(json.loads(line))
+                except ValueError:
+                    print(f"Warning: Ignoring unreadable entry in {self.journal_path}")
+                    damaged = True
+                    continue
+                if event.id in positions:
+                    events[positions[event.id]] = event
+                else:
+                    positions[event.id] = len(events)
+                    events.append(event)
+                self._journal_entries += 1
+
+        print(f"Replayed {self._journal_entries} journal entries from {self.journal_path}")
+        if damaged:
+            self.compact(events)
+        return events
+
+    def save(self, events, changed_ids=None):
+        """
+        With a journal, append the events in changed_ids to it; otherwise
+        (or when the journal is due for compaction) rewrite the whole file.
+        """
+        if (self.journal_path and changed_ids is not None and os.path.exists(self.path)
+                and self._journal_entries + len(changed_ids) < self.compact_threshold):
+            changed_ids = set(changed_ids)
+            changed = [event for event in events if event.id in changed_ids]
+            with open(self.journal_path, 'a') as f:
+                for event in changed:
+                    f.write(json.dumps(event.to_dict()) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+            self._journal_entries += len(changed)
+            print(f"Appended {len(changed)} changed events to {self.journal_path}")
+            return
+
+        self.compact(events)
+
+    def compact(self, events):
+        """Rewrite the JSON file with all events and drop the journal."""
+        write_events_json(self.path, events)
+        print(f"Saved {len(events)} events to {self.path}")
+        if self.journal_path and os.path.exists(self.journal_path):
+            os.remove(self.journal_path)
+        self._journal_entries = 0
+
+
+class SQLiteEventStore:
+    """
+    Stores events in an SQLite database with indexes on city and date.
+    Saves upsert only the changed rows in a single transaction.
+    If json_export is set, events.json is kept as an export of the database
+    (and used to seed a new, empty database).
+    """
+
+    def __init__(self, path='events.db', json_export=None):
+        self.path = path
+        self.json_export = json_export
+        self.conn = sqlite3.connect(path)
+        self.conn.row_factory = sqlite3.Row
+        with self.conn:
+            self.conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS events (
+                    {', '.join(f'{field} {SQLITE_TYPES.get(field, "TEXT")}' for field in EVENT_FIELDS)},
+                    position INTEGER NOT NULL,
+                    PRIMARY KEY (id)
+                )
+            """)
+            # Add columns introduced after the database was created
+            columns = {row['name'] for row in self.conn.execute("PRAGMA table_info(events)")}
+            for field in EVENT_FIELDS:
+                if field not in columns:
+                    self.conn.execute(f"ALTER TABLE events ADD COLUMN {field} {SQLITE_TYPES.get(field, 'TEXT')}")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS events_city ON events (city)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS events_date ON events (date)")
+
+    def _row_to_event(self, row):
+        return EventRecord.from_dict(dict(row))
+
+    def _query(self, where='', params=()):
+        rows = self.conn.execute(f"SELECT * FROM events {where} ORDER BY position", params)
+        return [self._row_to_event(row) for row in rows]
+
+    def load(self):
+        """Return all stored events as EventRecords, seeding an empty database from the JSON export."""
+        events = self._query()
+        if not events and self.json_export and os.path.exists(self.json_export):
+            try:
+                events = read_events_json(self.json_export)
+            except json.JSONDecodeError:
+                print(f"Warning: Could not parse {self.json_export}, starting fresh")
+                return []
+            self.upsert(events, range(len(events)))
+            print(f"Imported {len(events)} events from {self.json_export} into {self.path}")
+        print(f"Loaded {len(events)} existing events from {self.path}")
+        return events
+
+    def upsert(self, events, positions):
+        """Insert or update events (with their list positions) in one transaction."""
+        columns = ', '.join(EVENT_FIELDS + ('position',))
+        placeholders = ', '.join('?' for _ in range(len(EVENT_FIELDS) + 1))
+        updates = ', '.join(f"{field} = excluded.{field}" for field in EVENT_FIELDS[1:] + ('position',))
+        with self.conn:
+            self.conn.executemany(
+                f"INSERT INTO events ({columns}) VALUES ({placeholders}) "
+                f"ON CONFLICT (id) DO UPDATE SET {updates}",
+                [tuple(event.to_dict().values()) + (position,)
+                 for event, position in zip(events, positions)],
+            )
+
+    def save(self, events, changed_ids=None):
+        """
+        Upsert the events whose IDs are in changed_ids (all events if None),
+        then refresh the JSON export if one is configured.
+        """
+        if changed_ids is None:
+            rows = list(enumerate(events))
+        else:
+            changed_ids = set(changed_ids)
+            rows = [(position, event) for position, event in enumerate(events) if event.id in changed_ids]
+
+        self.upsert([event for _, event in rows], [position for position, _ in rows])
+        print(f"Saved {len(rows)} changed events to {self.path}")
+
+        if self.json_export:
+            write_events_json(self.json_export, events)
+            print(f"Exported {len(events)} events to {self.json_export}")
+
+    def find(self, event_id):
+        """Return the event with this ID, or None."""
+        events = self._query("WHERE id = ?", (event_id,))
+        return events[0] if events else None
+
+    def find_by_city(self, city):
+        """Return all events for a city."""
+        return self._query("WHERE city = ?", (city,))
+
+    def find_by_date(self, start, end=None):
+        """Return events on date `start`, or with start <= date < end (dates or YYYY-MM-DD strings)."""
+        if end is None:
+            return self._query("WHERE date = ?", (str(start),))
+        return self._query("WHERE date >= ? AND date < ?", (str(start), str(end)))
+
+
+def open_store(path, json_export=None):
+    """Return the event store for path: SQLite for .db/.sqlite files, JSON otherwise."""
+    if path.endswith(SQLITE_EXTENSIONS):
+        return SQLiteEventStore(path, json_export=json_export)
+    return JSONEventStore(path)
@@ -0,0 +1,116 @@
+import asyncio
+import random
+import time
+
+import aiohttp
+
+# Retry settings
+MAX_ATTEMPTS = 3           # Attempts per URL, including the first one
+BACKOFF_BASE = 0.5         # Seconds; backoff ceiling doubles with every attempt
+BACKOFF_MAX = 8.0          # Upper bound for a single backoff sleep
+REQUEST_DEADLINE = 30.0    # Wall-clock seconds a single URL may take across all attempts
+MIN_RETRIES = 10           # Retries always allowed per run...
+RETRY_RATIO = 0.2          # ...plus this fraction of all requests made
+
+# Circuit breaker settings
+BREAKER_THRESHOLD = 3      # Consecutive failures that open a host's circuit
+BREAKER_COOLDOWN = 60.0    # Seconds before a single trial request is let through
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(aiohttp.ClientError):
+    """Raised instead of sending a request to a host whose circuit is open."""
+
+
+class DeadlineExceededError(aiohttp.ClientError):
+    """Raised instead of waiting for a host (e.g. its Retry-After pause) past a URL's deadline."""
+
+
+class CircuitBreaker:
+    """
+    Per-host circuit breaker.
+    Opens after `threshold` consecutive failures; once `cooldown` seconds
+    have passed a single trial request is allowed (half-open), and its
+    outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, host, threshold=BREAKER_THRESHOLD, cooldown=BREAKER_COOLDOWN):
+        self.host = host
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+
+    def check(self):
+        """Raise CircuitOpenError if a request to this host is not allowed right now."""
+        if self.opened_at is None:
+            return
+        if self.trial_in_flight or time.monotonic() - self.opened_at < self.cooldown:
+            raise CircuitOpenError(f"Circuit open for {self.host}")
+        self.trial_in_flight = True
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self.trial_in_flight or (self.opened_at is None and self.failures >= self.threshold):
+            print(f"  - Circuit opened for {self.host} after {self.failures} failures")
+            self.opened_at = time.monotonic()
+        self.trial_in_flight = False
+
+
+class FetchPolicy:
+    """
+    Retry policy shared by all requests of a run.
+    Transient failures (timeouts, connection errors, 429/5xx) are retried
+    with exponential backoff and full jitter, limited per URL by
+    `max_attempts` and `deadline`, and per run by a retry budget.
+    Each host has a CircuitBreaker so a dead host fails fast.
+    """
+
+    def __init__(self, max_attempts=MAX_ATTEMPTS, backoff_base=BACKOFF_BASE,
+                 backoff_max=BACKOFF_MAX, deadline=REQUEST_DEADLINE,
+                 min_retries=MIN_RETRIES, retry_ratio=RETRY_RATIO,
+                 breaker_threshold=BREAKER_THRESHOLD, breaker_cooldown=BREAKER_COOLDOWN):
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.deadline = deadline
+        self.min_retries = min_retries
+        self.retry_ratio = retry_ratio
+        self.breaker_threshold = breaker_threshold
+        self.breaker_cooldown = breaker_cooldown
+        self.requests = 0
+        self.retries = 0
+        self._breakers = {}
+
+    def breaker(self, host):
+        """Return the circuit breaker for host, creating it on first use."""
+        if host not in self._breakers:
+            self._breakers[host] = CircuitBreaker(host, self.breaker_threshold, self.breaker_cooldown)
+        return self._breakers[host]
+
+    def is_retryable(self, error):
+        """Whether a failed attempt is worth retrying (and counts against the host)."""
+        if isinstance(error, (CircuitOpenError, DeadlineExceededError)):
+            return False
+        if isinstance(error, aiohttp.ClientResponseError):
+            return error.status in RETRY_STATUSES
+        return isinstance(error, (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError, asyncio.TimeoutError))
+
+    def backoff(self, attempt):
+        """Seconds to sleep before the attempt following `attempt` (full jitter)."""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def can_retry(self, attempt, deadline, delay):
+        """Whether another attempt fits the per-URL limits and the run's retry budget."""
+        if attempt >= self.max_attempts:
+            return False
+        if time.monotonic() + delay >= deadline:
+            return False
+        return self.retries < self.min_retries + self.retry_ratio * self.requests
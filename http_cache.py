@@ -0,0 +1,86 @@
+import copy
+import hashlib
+import json
+import os
+
+from atomic_file import atomic_write, read_with_recovery
+
+HTTP_CACHE_FILE = 'http_cache.json'
+PARSE_VERSION = 1          # Bump when a parser's output changes, to drop stale cached results
+
+
+def content_digest(content):
+    """Return the SHA-256 hex digest of a response body."""
+    return hashlib.sha256(content).hexdigest()
+
+
+class HTTPCache:
+    """
+    Persistent HTTP validator cache.
+    Stores the ETag / Last-Modified validators of each fetched URL together
+    with the result parsed from that response and a digest of the body,
+    so an unchanged page (304 Not Modified, or a 200 with a byte-identical
+    body) can reuse the parsed result without re-parsing. Entries written
+    under another PARSE_VERSION are dropped on load, so the pages are
+    fetched and parsed again.
+    """
+
+    def __init__(self, cache_file=HTTP_CACHE_FILE):
+        self.cache_file = cache_file
+        self.entries = {}
+        self.load()
+
+    def _read(self, path):
+        with open(path, 'r') as f:
+            return json.load(f)
+
+    def load(self):
+        """Load cached validators from JSON file."""
+        if os.path.exists(self.cache_file):
+            try:
+                data = read_with_recovery(self.cache_file, self._read)
+            except json.JSONDecodeError:
+                print(f"Warning: Could not parse {self.cache_file}, starting with empty HTTP cache")
+                self.entries = {}
+                return
+            if data.get('version') == PARSE_VERSION:
+                self.entries = data.get('entries', {})
+
+    def save(self):
+        """Atomically save cached validators to JSON file."""
+        with atomic_write(self.cache_file) as f:
+            json.dump({'version': PARSE_VERSION, 'entries': self.entries}, f, indent=2)
+
+    def conditional_headers(self, url):
+        """Return If-None-Match / If-Modified-Since headers for a cached URL."""
+        entry = self.entries.get(url)
+        if not entry or entry.get('data') is None:
+            return {}
+
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def get(self, url, digest=None):
+        """
+        Return a copy of the parsed result cached for url, or None.
+        When digest is given, only return it if the cached body had the same digest.
+        """
+        entry = self.entries.get(url)
+        if not entry:
+            return None
+        if digest is not None and entry.get('sha256') != digest:
+            return None
+        return copy.deepcopy(entry.get('data'))
+
+    def store(self, url, response, data, digest=None):
+        """Remember the validators and body digest of response and the result parsed from it."""
+        self.entries[url] = {
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'sha256': digest or content_digest(response.content),
+            'data': copy.deepcopy(data),
+        }
@@ -0,0 +1,213 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from urllib.parse import urlparse
+
+import aiohttp
+from multidict import CIMultiDict
+
+from fetch_policy import DeadlineExceededError, FetchPolicy
+from rate_limiter import RateLimiter, parse_retry_after
+
+# Connection pool settings
+MAX_CONNECTIONS = 8        # Global cap on open connections / in-flight requests
+PER_HOST_LIMIT = 1         # Max concurrent requests to a single host
+REQUEST_TIMEOUT = 10       # Seconds per attempt
+DNS_CACHE_TTL = 300        # Seconds to keep resolved hostnames
+
+# Exceptions that mean "this fetch failed" rather than a programming error
+FETCH_ERRORS = (aiohttp.ClientError, asyncio.TimeoutError)
+
+
+def host_of(url):
+    """Return the lower-cased host part of a URL."""
+    return urlparse(url).netloc.lower()
+
+
+@dataclass
+class FetchResponse:
+    url: str
+    status: int
+    headers: CIMultiDict = field(default_factory=CIMultiDict)
+    content: bytes = b''
+
+
+class HostThrottle:
+    """
+    Per-host politeness limiter shared by all fetch tasks.
+    Caps the number of concurrent requests to a single host.
+    """
+
+    def __init__(self, limit=PER_HOST_LIMIT):
+        self.limit = limit
+        self._semaphores = {}
+
+    @asynccontextmanager
+    async def slot(self, host):
+        """Hold a request slot for host."""
+        semaphore = self._semaphores.setdefault(host, asyncio.Semaphore(self.limit))
+        async with semaphore:
+            yield
+
+
+class AsyncHTTPClient:
+    """
+    Shared asyncio HTTP client.
+    One aiohttp session (and so one connection pool with keep-alive and
+    TLS reuse) is used for every request made inside the `async with` block.
+    Request pacing per host comes from an adaptive RateLimiter, which is fed
+    the status, latency and Retry-After of every response. Retries and
+    circuit breaking follow a FetchPolicy.
+    """
+
+    def __init__(self, headers=None, max_connections=MAX_CONNECTIONS,
+                 per_host_limit=PER_HOST_LIMIT, rate_limiter=None, policy=None,
+                 timeout=REQUEST_TIMEOUT):
+        self.headers = dict(headers or {})
+        self.max_connections = max_connections
+        self.per_host_limit = per_host_limit
+        self.timeout = timeout
+        self.throttle = HostThrottle(limit=per_host_limit)
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self.policy = policy or FetchPolicy()
+        self._session = None
+
+    async def __aenter__(self):
+        # The per-host cap is left to HostThrottle; a connector cap would
+        # also count the connection held by an open stream()
+        connector = aiohttp.TCPConnector(
+            limit=self.max_connections,
+            ttl_dns_cache=DNS_CACHE_TTL,
+        )
+        self._session = aiohttp.ClientSession(
+            connector=connector,
+            headers=self.headers,
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+        )
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self._session.close()
+        self._session = None
+
+    async def get(self, url, headers=None):
+        """
+        GET a URL through the shared pool and return a FetchResponse.
+        A 304 Not Modified answer to a conditional request is returned
+        as-is with empty content. Transient failures are retried according
+        to the client's FetchPolicy.
+        Raises one of FETCH_ERRORS once the URL has failed for good.
+        """
+        host = host_of(url)
+        return await self._with_retries(url, host, lambda deadline: self._get_once(url, host, headers, deadline))
+
+    @asynccontextmanager
+    async def stream(self, url, headers=None):
+        """
+        GET a URL and yield the aiohttp response as soon as its headers
+        have arrived, so the body can be consumed chunk by chunk
+        (response.content.iter_chunked). Opening the connection is retried
+        like get(); failures while reading the body are not.
+        The stream is paced by the RateLimiter but takes no HostThrottle
+        slot: its body may be read for as long as the caller needs, and
+        requests to the same host made meanwhile (e.g. for links found in
+        the streamed page) must not wait for it to finish.
+        """
+        host = host_of(url)
+
+        response = await self._with_retries(url, host, lambda deadline: self._open_stream(url, host, headers, deadline))
+        try:
+            yield response
+        finally:
+            response.release()
+
+    async def _with_retries(self, url, host, attempt_request):
+        """Run attempt_request(deadline) until it succeeds or the FetchPolicy gives up."""
+        breaker = self.policy.breaker(host)
+        deadline = time.monotonic() + self.policy.deadline
+        self.policy.requests += 1
+        attempt = 0
+
+        while True:
+            breaker.check()
+            attempt += 1
+
+            try:
+                response = await attempt_request(deadline)
+            except FETCH_ERRORS as e:
+                retryable = self.policy.is_retryable(e)
+                # A host that asks us to wait past the deadline is as good as down
+                if retryable or isinstance(e, DeadlineExceededError):
+                    breaker.record_failure()
+                else:
+                    breaker.record_success()
+
+                delay = self.policy.backoff(attempt)
+                # The next attempt also has to wait out a Retry-After pause of the host
+                wait = max(delay, self.rate_limiter.paused_for(host))
+                if not retryable or not self.policy.can_retry(attempt, deadline, wait):
+                    raise
+
+                self.policy.retries += 1
+                # Timeouts and some client errors have an empty message
+                print(f"  - Retrying {url} in {wait:.1f}s (attempt {attempt + 1}): {str(e) or type(e).__name__}")
+                await asyncio.sleep(wait)
+                continue
+
+            breaker.record_success()
+            return response
+
+    async def _get_once(self, url, host, headers, deadline):
+        """Make a single paced request attempt, bounded by deadline."""
+        async with self.throttle.slot(host):
+            await self.rate_limiter.acquire(host, deadline)
+            started = time.monotonic()
+            timeout = aiohttp.ClientTimeout(total=max(0.1, min(self.timeout, deadline - started)))
+
+            try:
+                async with self._session.get(url, headers=headers, timeout=timeout) as response:
+                    content = await response.read()
+            except FETCH_ERRORS:
+                self.rate_limiter.record(host, None, time.monotonic() - started)
+                raise
+
+            self.rate_limiter.record(
+                host,
+                response.status,
+                time.monotonic() - started,
+                parse_retry_after(response.headers.get('Retry-After')),
+            )
+
+        response.raise_for_status()
+        return FetchResponse(
+            url=str(response.url),
+            status=response.status,
+            headers=response.headers.copy(),
+            content=content,
+        )
+
+    async def _open_stream(self, url, host, headers, deadline):
+        """Make a single paced request attempt and return the response with its body unread."""
+        await self.rate_limiter.acquire(host, deadline)
+        started = time.monotonic()
+        # No total timeout: a slow but steady body is fine, a stalled one is not
+        timeout = aiohttp.ClientTimeout(total=None, sock_connect=self.timeout, sock_read=self.timeout)
+
+        try:
+            response = await self._session.get(url, headers=headers, timeout=timeout)
+        except FETCH_ERRORS:
+            self.rate_limiter.record(host, None, time.monotonic() - started)
+            raise
+
+        self.rate_limiter.record(
+            host,
+            response.status,
+            time.monotonic() - started,
+            parse_retry_after(response.headers.get('Retry-After')),
+        )
+
+        if response.status >= 400:
+            response.release()
+            response.raise_for_status()
+        return response
@@ -0,0 +1,84 @@
+import hashlib
+import json
+import os
+
+from atomic_file import atomic_write, read_with_recovery
+
+ICS_CACHE_FILE = 'ics_cache.json'
+RENDER_VERSION = 2         # Bump when the VEVENT layout changes, to drop stale cached blocks
+
+
+def event_digest(event):
+    """Return the SHA-256 hex digest of an EventRecord's stored fields."""
+    return hashlib.sha256(json.dumps(event.to_dict()).encode('utf-8')).hexdigest()
+
+
+def calendar_fingerprint(events):
+    """Return a SHA-256 hex digest of a calendar's events (and their order) and the render version."""
+    fingerprint = hashlib.sha256(f"v{RENDER_VERSION}".encode('ascii'))
+    for event in events:
+        fingerprint.update(event_digest(event).encode('ascii'))
+    return fingerprint.hexdigest()
+
+
+class VEventCache:
+    """
+    Persistent cache of rendered VEVENT blocks.
+    Each entry holds the iCalendar bytes of one event together with the
+    digest of the event data they were rendered from, so an unchanged
+    event is spliced into the next calendar without being rendered again.
+    It also remembers the fingerprint of the events each ICS file was last
+    written from, so an unchanged calendar need not be written at all.
+    """
+
+    def __init__(self, cache_file=ICS_CACHE_FILE):
+        self.cache_file = cache_file
+        self.entries = {}
+        # ICS file path -> calendar_fingerprint of the events it was written from
+        self.outputs = {}
+        # Lookups answered from / missing in the cache
+        self.hits = 0
+        self.misses = 0
+        self.load()
+
+    def _read(self, path):
+        with open(path, 'r') as f:
+            return json.load(f)
+
+    def load(self):
+        """Load cached VEVENT blocks from JSON file."""
+        if os.path.exists(self.cache_file):
+            try:
+                data = read_with_recovery(self.cache_file, self._read)
+            except json.JSONDecodeError:
+                print(f"Warning: Could not parse {self.cache_file}, starting with empty ICS cache")
+                return
+            if data.get('version') == RENDER_VERSION:
+                self.entries = data.get('entries', {})
+                self.outputs = data.get('outputs', {})
+
+    def save(self):
+        """Atomically save cached VEVENT blocks to JSON file."""
+        with atomic_write(self.cache_file) as f:
+            json.dump({'version': RENDER_VERSION, 'outputs': self.outputs, 'entries': self.entries}, f, indent=2)
+
+    def get(self, event_id, digest):
+        """Return the VEVENT bytes cached for event_id if they were rendered from digest, else None."""
+        entry = self.entries.get(event_id)
+        if not entry or entry.get('sha256') != digest:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry['vevent'].encode('utf-8')
+
+    def store(self, event_id, digest, vevent):
+        """Remember the VEVENT bytes rendered for event_id from data with this digest."""
+        self.entries[event_id] = {
+            'sha256': digest,
+            'vevent': vevent.decode('utf-8'),
+        }
+
+    def retain(self, event_ids):
+        """Drop the entries of events not in event_ids."""
+        event_ids = set(event_ids)
+        self.entries = {event_id: entry for event_id, entry in self.entries.items() if event_id in event_ids}
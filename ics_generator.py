@@ -1,31 +1,143 @@
 from icalendar import Calendar, Event
-from datetime import datetime
-from zoneinfo import ZoneInfo
+from datetime import datetime, timedelta
+import io
 import json
 import os
+from atomic_file import atomic_write
+from event_record import UTC, EventRecord
+from event_store import read_events_json
+from ics_cache import calendar_fingerprint, event_digest
+
+EVENT_CATEGORIES = 'conference,unconference,analytics,webanalytics,measurecamp'
+EVENT_DURATION = timedelta(hours=8)    # Assume 1 day event
+CALENDAR_FOOTER = b'END:VCALENDAR\r\n'
+FOLD_LIMIT = 75                        # Content lines are folded before reaching this many octets
+
+# TEXT value escapes (RFC 5545 3.3.11), after newlines are normalised to \n
+TEXT_ESCAPES = str.maketrans({'\\': '\\\\', ';': '\\;', ',': '\\,', '\n': '\\n', '\r': '\\n'})
+
+
+def escape_text(text):
+    """Escape a TEXT property value the way icalendar's vText does."""
+    return text.replace('\\N', '\n').replace('\r\n', '\n').translate(TEXT_ESCAPES)
+
+
+def fold_line(line):
+    """
+    Fold a content line the way icalendar does: before FOLD_LIMIT octets,
+    without splitting a multi-byte character, and moving a trailing
+    backslash or caret to the next line so escapes stay in one piece.
+    """
+    if line.isascii():
+        if len(line) < FOLD_LIMIT:
+            return line
+        chunks = []
+        start = 0
+        while len(line) - start >= FOLD_LIMIT:
+            end = start + FOLD_LIMIT - 1
+            if line[end - 1] in '\\^':
+                end -= 1
+            chunks.append(line[start:end])
+            start = end
+        chunks.append(line[start:])
+        return '\r\n '.join(chunks)
+    if len(line.encode('utf-8')) < FOLD_LIMIT:
+        return line
+
+    chunks = []
+    current = []
+    size = 0
+    for char in line:
+        width = len(char.encode('utf-8'))
+        if current and size + width >= FOLD_LIMIT:
+            if len(current) > 1 and current[-1] in '\\^':
+                moved = current.pop()
+                chunks.append(''.join(current))
+                current = [moved]
+                size = 1
+            else:
+                chunks.append(''.join(current))
+                current = []
+                size = 0
+        current.append(char)
+        size += width
+    if current:
+        chunks.append(''.join(current))
+    return '\r\n '.join(chunks)
+
+
+class BuildContext:
+    """
+    Values shared by all events of one calendar build, computed once:
+    the time zone, the build timestamp (used for events and calendars
+    without a change history) and the encoded constant properties.
+    """
+
+    def __init__(self, now=None):
+        self.zone = UTC
+        self.now = now or datetime.now(self.zone)
+
+        # Let icalendar encode the shared values once; events reuse the encoded properties
+        constants = Event()
+        constants.add('categories', EVENT_CATEGORIES)
+        constants.add('duration', EVENT_DURATION)
+        constants.add('transp', 'OPAQUE')  # Mark as busy
+        self.properties = {name: constants[name] for name in ('categories', 'duration', 'transp')}
+        # The same values as finished content lines, for the fast path serializer
+        self.lines = {name: fold_line(f"{name.upper()}:{value.to_ical().decode('utf-8')}")
+                      for name, value in self.properties.items()}
+
 
 class ICSGenerator:
-    def __init__(self, events_file='events.json'):
+    def __init__(self, events_file='events.json', events=None, cache=None):
+        """
+        events may be an in-memory list of events or an EventManager, so the
+        calendar is built from the same snapshot without re-reading the file.
+        events_file is only read when no events are given.
+        cache is an optional ics_cache.VEventCache: unchanged events then
+        reuse their previously rendered VEVENT blocks.
+        """
         self.events_file = events_file
+        self.cache = cache
         self.events = []
-        self.load_events()
+        if events is None:
+            self.load_events()
+        else:
+            self.set_events(events)
+
+    def set_events(self, events):
+        """Use an in-memory list of EventRecords/dicts (or an EventManager's events)."""
+        if hasattr(events, 'get_all_events'):
+            events = events.get_all_events()
+        self.events = [EventRecord.coerce(event) for event in events]
+        print(f"Using {len(self.events)} in-memory events for ICS generation")
 
     def load_events(self):
         """Load events from JSON file."""
         if os.path.exists(self.events_file):
             try:
-                with open(self.events_file, 'r') as f:
-                    data = json.load(f)
-                    self.events = data.get('events', [])
-                    print(f"Loaded {len(self.events)} events for ICS generation")
+                self.events = read_events_json(self.events_file)
+                print(f"Loaded {len(self.events)} events for ICS generation")
             except json.JSONDecodeError as e:
                 print(f"Error loading events file: {e}")
                 self.events = []
         else:
             print(f"Events file not found: {self.events_file}")
 
-    def create_calendar(self):
-        """Create an iCalendar object with all events."""
+    def create_calendar(self, context=None):
+        """Create an iCalendar object with all events (context: a BuildContext, default: now)."""
+        context = context or BuildContext()
+        cal = self.create_calendar_header(context)
+
+        for event_data in self.events:
+            event = self.create_event(event_data, context)
+            if event:
+                cal.add_component(event)
+
+        return cal
+
+    def create_calendar_header(self, context):
+        """Create the iCalendar object with the calendar properties only."""
         cal = Calendar()
         cal.add('prodid', '-//MeasureCamp Calendar Scraper//github.com/braniq//EN')
         cal.add('version', '2.0')
@@ -37,79 +149,164 @@ class ICSGenerator:
         cal.add('refresh-interval;value=duration', 'P1D')  # Refresh daily
         cal.add('color', '#A32638')  # MeasureCamp brand red
 
-        # Add sequence and last-modified for cache-busting
-        # Calendar apps use this to detect updates and force refresh
-        import time
-        timestamp = int(time.time())
-        cal.add('sequence', timestamp % 10000)  # Unique sequence number
-        cal.add('last-modified', datetime.now(ZoneInfo('UTC')))
-
-        for event_data in self.events:
-            event = self.create_event(event_data)
-            if event:
-                cal.add_component(event)
+        # Last-modified is the latest change of any event, so it only moves when the content does
+        # (per-event SEQUENCE/LAST-MODIFIED tell calendar apps which events changed)
+        cal.add('last-modified', max((event_data.updated_at for event_data in self.events
+                                      if event_data.updated_at), default=context.now))
 
         return cal
 
-    def create_event(self, event_data):
-        """Create an iCalendar Event from event data."""
+    def create_event(self, event_data, context=None):
+        """Create an iCalendar Event from an EventRecord (context: a BuildContext, default: now)."""
+        context = context or BuildContext()
         try:
-            # Parse date and time
-            date_str = event_data.get('date')
-            time_str = event_data.get('time', '09:00')
-
-            if not date_str:
-                print(f"Warning: No date for event {event_data.get('id')}")
+            if not event_data.date:
+                print(f"Warning: No date for event {event_data.id}")
                 return None
 
-            # Combine date and time
-            datetime_str = f"{date_str} {time_str}"
-            event_datetime = datetime.strptime(datetime_str, '%Y-%m-%d %H:%M')
-
-            # Set timezone to UTC (can be adjusted by calendar apps)
-            event_datetime = event_datetime.replace(tzinfo=ZoneInfo('UTC'))
+            # Start in UTC (can be adjusted by calendar apps), parsed once per record
+            event_datetime = event_data.start
 
             # Create event
             event = Event()
-            event.add('uid', f"{event_data.get('id')}@measurecamp.org")
-            event.add('dtstamp', datetime.now(ZoneInfo('UTC')))
+            event.add('uid', f"{event_data.id}@measurecamp.org")
             event.add('dtstart', event_datetime)
 
             # Clean summary - just city name
-            event.add('summary', f"MeasureCamp {event_data.get('city')}")
+            event.add('summary', f"MeasureCamp {event_data.city}")
 
             # Clean location - just venue name
-            venue = event_data.get('venue', 'TBD')
+            venue = event_data.venue
             event.add('location', venue)
 
             # Clean description - structured format
-            description = f"MeasureCamp unconference in {event_data.get('city')}\n\nVenue: {venue}\n\nMore info: {event_data.get('url')}"
+            description = f"MeasureCamp unconference in {event_data.city}\n\nVenue: {venue}\n\nMore info: {event_data.url}"
             event.add('description', description)
 
-            event.add('url', event_data.get('url'))
-            event.add('categories', 'conference,unconference,analytics,webanalytics,measurecamp')
+            event.add('url', event_data.url)
 
-            # Set event duration (assume 1 day event)
-            from datetime import timedelta
-            event.add('duration', timedelta(hours=8))
+            # Stamp, sequence and last-modified come from the event's change history,
+            # so an unchanged event looks the same to calendar apps on every build
+            event.add('dtstamp', event_data.updated_at or context.now)
+            event.add('sequence', event_data.sequence)
+            if event_data.updated_at:
+                event.add('last-modified', event_data.updated_at)
 
-            # Mark as busy
-            event.add('transp', 'OPAQUE')
+            # Categories, duration and busy status are the same for every event
+            for name, value in context.properties.items():
+                event.add(name, value)
 
             return event
 
         except Exception as e:
-            print(f"Error creating event for {event_data.get('id')}: {e}")
+            print(f"Error creating event for {event_data.id}: {e}")
             return None
 
-    def save_ics(self, output_file='measurecamp-events.ics'):
-        """Generate and save the ICS file."""
-        cal = self.create_calendar()
+    def serialize_event(self, event_data, context):
+        """
+        Fast path: write the VEVENT of an event directly, with the same bytes
+        as create_event(event_data, context).to_ical(). Returns None for
+        events with missing fields, which are left to icalendar.
+        """
+        if None in (event_data.id, event_data.city, event_data.url, event_data.venue, event_data.start,
+                    event_data.updated_at):
+            return None
+
+        # Properties in icalendar's order: canonical ones first, then alphabetical
+        description = f"MeasureCamp unconference in {event_data.city}\n\nVenue: {event_data.venue}\n\nMore info: {event_data.url}"
+        lines = (
+            'BEGIN:VEVENT',
+            f"SUMMARY:{escape_text(f'MeasureCamp {event_data.city}')}",
+            f"DTSTART:{event_data.start:%Y%m%dT%H%M%SZ}",
+            context.lines['duration'],
+            f"DTSTAMP:{event_data.updated_at:%Y%m%dT%H%M%SZ}",
+            f"UID:{escape_text(f'{event_data.id}@measurecamp.org')}",
+            f"SEQUENCE:{event_data.sequence}",
+            context.lines['categories'],
+            f"DESCRIPTION:{escape_text(description)}",
+            f"LAST-MODIFIED:{event_data.updated_at:%Y%m%dT%H%M%SZ}",
+            f"LOCATION:{escape_text(event_data.venue)}",
+            context.lines['transp'],
+            f"URL:{event_data.url}",
+            'END:VEVENT',
+            '',
+        )
+        return '\r\n'.join([fold_line(line) for line in lines]).encode('utf-8')
+
+    def _render_event(self, event_data, context):
+        vevent = self.serialize_event(event_data, context)
+        if vevent is None:
+            event = self.create_event(event_data, context)
+            vevent = event.to_ical() if event else None
+        return vevent
 
+    def render_event(self, event_data, context):
+        """Return the VEVENT bytes of an event (None if it cannot be rendered), using the cache."""
+        if self.cache is None:
+            return self._render_event(event_data, context)
+
+        digest = event_digest(event_data)
+        vevent = self.cache.get(event_data.id, digest)
+        if vevent is None:
+            vevent = self._render_event(event_data, context)
+            if vevent is None:
+                return None
+            self.cache.store(event_data.id, digest, vevent)
+        return vevent
+
+    def write_ics(self, f, context=None):
+        """
+        Stream the calendar to the binary file f: the calendar header, then
+        each VEVENT as soon as it is rendered, then the footer. Only one
+        event is held in memory at a time; the bytes are the same as
+        create_calendar().to_ical().
+        With a cache only new or changed events are rendered; the cached
+        VEVENT blocks of the others are spliced in as they are.
+        """
+        context = context or BuildContext()
+        if self.cache is not None:
+            # The cache's counters cover its whole lifetime; report this build only
+            hits, misses = self.cache.hits, self.cache.misses
+        header = self.create_calendar_header(context).to_ical()
+        # The header ends the (still empty) calendar; events go before END:VCALENDAR
+        f.write(header[:-len(CALENDAR_FOOTER)])
+
+        for event_data in self.events:
+            vevent = self.render_event(event_data, context)
+            if vevent:
+                f.write(vevent)
+
+        f.write(CALENDAR_FOOTER)
+
+        if self.cache is not None:
+            self.cache.retain(event_data.id for event_data in self.events)
+            print(f"Rendered {self.cache.misses - misses} events, reused {self.cache.hits - hits} cached events")
+
+    def render_ics(self, context=None):
+        """Return the calendar as ICS bytes (see write_ics)."""
+        buffer = io.BytesIO()
+        self.write_ics(buffer, context)
+        return buffer.getvalue()
+
+    def save_ics(self, output_file='measurecamp-events.ics', skip_unchanged=False):
+        """
+        Generate and atomically save the ICS file (and the VEVENT cache, if any).
+        With skip_unchanged and a cache, nothing is rendered or written if
+        output_file was last written from exactly the same events.
+        """
         try:
-            with open(output_file, 'wb') as f:
-                f.write(cal.to_ical())
+            fingerprint = calendar_fingerprint(self.events) if self.cache is not None else None
+            if (skip_unchanged and fingerprint is not None and os.path.exists(output_file)
+                    and self.cache.outputs.get(output_file) == fingerprint):
+                print(f"Events unchanged, keeping {output_file}")
+                return True
+
+            with atomic_write(output_file, 'wb') as f:
+                self.write_ics(f)
             print(f"Saved calendar to {output_file}")
+            if self.cache is not None:
+                self.cache.outputs[output_file] = fingerprint
+                self.cache.save()
             return True
         except Exception as e:
             print(f"Error saving ICS file: {e}")
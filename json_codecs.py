@@ -0,0 +1,127 @@
+"""
+JSON codecs for the event database.
+
+Each codec reads and writes the {"events": [...]} document. The fastest
+codec available is picked at import time:
+
+1. msgspec   - pip install msgspec
+2. orjson    - pip install orjson
+3. json      - stdlib, always available
+
+In compatibility mode (the default) every codec writes exactly the same
+bytes as json.dump(data, f, indent=2), so switching codecs never changes
+events.json. With compat=False, orjson/msgspec write raw UTF-8 instead of
+\\u escapes, which is faster.
+"""
+
+import codecs
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+
+def _json_escape_errors(error):
+    """Encoding error handler writing unencodable characters as JSON \\u escapes."""
+    escaped = []
+    for char in error.object[error.start:error.end]:
+        code = ord(char)
+        if code > 0xFFFF:
+            code -= 0x10000
+            escaped.append('\\u%04x\\u%04x' % (0xD800 | (code >> 10), 0xDC00 | (code & 0x3FF)))
+        else:
+            escaped.append('\\u%04x' % code)
+    return ''.join(escaped), error.end
+
+
+codecs.register_error('json_escape', _json_escape_errors)
+
+
+def ensure_ascii(data):
+    """Rewrite UTF-8 JSON bytes with non-ASCII characters escaped like json.dumps does."""
+    # DEL is ASCII but json.dumps escapes it too; it can only occur inside strings
+    data = data.replace(b'\x7f', b'\\u007f')
+    if data.isascii():
+        return data
+    return data.decode('utf-8').encode('ascii', 'json_escape')
+
+
+class StdlibCodec:
+    name = 'json'
+
+    def decode_events(self, data):
+        """Return the events list of a JSON database document. Raises json.JSONDecodeError."""
+        return json.loads(data).get('events', [])
+
+    def encode_events(self, events, compat=True):
+        """Return the JSON database document for events as bytes."""
+        return json.dumps({'events': events}, indent=2).encode('ascii')
+
+
+class OrjsonCodec:
+    name = 'orjson'
+
+    def decode_events(self, data):
+        """Return the events list of a JSON database document. Raises json.JSONDecodeError."""
+        # orjson.JSONDecodeError is a json.JSONDecodeError
+        return orjson.loads(data).get('events', [])
+
+    def encode_events(self, events, compat=True):
+        """Return the JSON database document for events as bytes."""
+        data = orjson.dumps({'events': events}, option=orjson.OPT_INDENT_2)
+        return ensure_ascii(data) if compat else data
+
+
+class MsgspecCodec:
+    name = 'msgspec'
+
+    def __init__(self):
+        # Untyped like the other codecs: event dicts are checked and converted
+        # by EventRecord.from_dict, so only malformed JSON is an error here
+        self._decoder = msgspec.json.Decoder()
+        self._encoder = msgspec.json.Encoder()
+
+    def decode_events(self, data):
+        """Return the events list of a JSON database document. Raises json.JSONDecodeError."""
+        try:
+            return self._decoder.decode(data).get('events', [])
+        except msgspec.DecodeError as e:
+            raise json.JSONDecodeError(str(e), data if isinstance(data, str) else '', 0) from e
+
+    def encode_events(self, events, compat=True):
+        """Return the JSON database document for events as bytes."""
+        data = msgspec.json.format(self._encoder.encode({'events': events}), indent=2)
+        return ensure_ascii(data) if compat else data
+
+
+def available_codecs():
+    """Return the names of all usable codecs, fastest first."""
+    names = []
+    if msgspec is not None:
+        names.append('msgspec')
+    if orjson is not None:
+        names.append('orjson')
+    names.append('json')
+    return names
+
+
+def get_codec(name=None):
+    """Return the codec called name, or the fastest available one."""
+    name = name or available_codecs()[0]
+    if name not in available_codecs():
+        raise ValueError(f"JSON codec not available: {name}")
+    if name == 'orjson':
+        return OrjsonCodec()
+    if name == 'msgspec':
+        return MsgspecCodec()
+    return StdlibCodec()
+
+
+DEFAULT_CODEC = get_codec()
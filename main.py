@@ -6,16 +6,19 @@ This script:
 1. Scrapes the MeasureCamp calendar page for all events
 2. Fetches details from each event's subdomain
 3. Updates the local event database (events.json)
+   (steps 1-3 run as one pipeline: links are fetched and merged as they are found)
 4. Generates an ICS calendar file (measurecamp-events.ics)
 5. Returns exit code 0 if successful
 
 Intended to be run daily via GitHub Actions.
 """
 
+import asyncio
 import sys
 from datetime import datetime
-from scraper import scrape_all_events
+from pipeline import run_pipeline
 from event_manager import EventManager
+from ics_cache import VEventCache
 from ics_generator import ICSGenerator
 
 
@@ -25,20 +28,16 @@ def main():
     print("=" * 60)
 
     try:
-        # Phase 1: Scrape events
-        print("\n[1/3] Scraping MeasureCamp events...")
-        scraped_events = scrape_all_events()
+        # Phase 1: Scrape events and update event database (pipelined)
+        print("\n[1/2] Scraping MeasureCamp events and updating event database...")
+        manager = EventManager('events.json')
+        scraped_count, changed_ids = asyncio.run(run_pipeline(manager))
 
-        if not scraped_events:
+        if not scraped_count:
             print("WARNING: No events scraped!")
             return 1
 
-        print(f"Successfully scraped {len(scraped_events)} events")
-
-        # Phase 2: Update event database
-        print("\n[2/3] Updating event database...")
-        manager = EventManager('events.json')
-        changed_ids = manager.update_events(scraped_events)
+        print(f"Successfully scraped {scraped_count} events")
         manager.save_events()
 
         if changed_ids:
@@ -46,10 +45,10 @@ def main():
         else:
             print("No changes detected")
 
-        # Phase 3: Generate ICS calendar
-        print("\n[3/3] Generating ICS calendar file...")
-        generator = ICSGenerator('events.json')
-        success = generator.save_ics('measurecamp-events.ics')
+        # Phase 2: Generate ICS calendar
+        print("\n[2/2] Generating ICS calendar file...")
+        generator = ICSGenerator(events=manager, cache=VEventCache())
+        success = generator.save_ics('measurecamp-events.ics', skip_unchanged=True)
 
         if not success:
             print("ERROR: Failed to generate ICS file")
@@ -0,0 +1,221 @@
+"""
+HTML parser backends for the scraper.
+
+Each backend extracts the same raw pieces of text from the calendar and
+event pages; scraper.py turns them into event data. The fastest backend
+available is picked at import time:
+
+1. selectolax (lexbor engine)   - pip install selectolax
+2. BeautifulSoup + lxml         - pip install lxml
+3. BeautifulSoup + html.parser  - always available
+"""
+
+from html.parser import HTMLParser
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
+try:
+    import lxml  # noqa: F401  (only needed by BeautifulSoup's 'lxml' feature)
+    HAS_LXML = True
+except ImportError:
+    HAS_LXML = False
+
+# Keys returned by ParserBackend.event_header()
+HEADER_FIELDS = ('date_text', 'time_text', 'venue_text', 'address_text')
+
+
+def has_class(class_name):
+    """
+    Return a SoupStrainer attribute matcher for a single CSS class.
+    While parsing, the strainer sees the raw class attribute string
+    ("headerdetails datey"), so a plain class_='headerdetails' never matches.
+    """
+    def match(value):
+        if value is None:
+            return False
+        return class_name in (value.split() if isinstance(value, str) else value)
+    return match
+
+
+# Partial-parse filters: only these elements (and their subtrees) are built
+CALENDAR_STRAINER = SoupStrainer('a', href=True)
+EVENT_HEADER_STRAINER = SoupStrainer('div', class_=has_class('headerdetails'))
+
+
+class SoupBackend:
+    """
+    BeautifulSoup backend using the given tree builder ('lxml' or 'html.parser').
+    With partial=True only the elements the scraper reads are materialised
+    (anchors on the calendar page, the headerdetails blocks on event pages),
+    the rest of the document is skipped while parsing.
+    """
+
+    def __init__(self, features, partial=True):
+        self.name = features if partial else f"{features} (full tree)"
+        self.features = features
+        self.partial = partial
+
+    def _soup(self, content, strainer):
+        return BeautifulSoup(content, self.features, parse_only=strainer if self.partial else None)
+
+    def _text(self, tag):
+        return tag.get_text(strip=True) if tag else None
+
+    def calendar_links(self, content):
+        """Return (href, text) for every <a href> on the page."""
+        soup = self._soup(content, CALENDAR_STRAINER)
+        return [(link['href'], link.get_text(strip=True)) for link in soup.find_all('a', href=True)]
+
+    def event_header(self, content):
+        """
+        Return the raw header texts of an event page as a dict with
+        HEADER_FIELDS keys; a key is None when its element is missing.
+        """
+        soup = self._soup(content, EVENT_HEADER_STRAINER)
+        header = dict.fromkeys(HEADER_FIELDS)
+
+        header_details = soup.find('div', class_='headerdetails datey')
+        header_date = header_details.find('div', class_='headerdate') if header_details else None
+        if header_date:
+            header['date_text'] = self._text(header_date.find('h3'))
+            header['time_text'] = self._text(header_date.find('span'))
+
+        header_loc = soup.find('div', class_='headerdetails locy')
+        header_loc_div = header_loc.find('div', class_='headerloc') if header_loc else None
+        if header_loc_div:
+            header['venue_text'] = self._text(header_loc_div.find('h3'))
+            header['address_text'] = self._text(header_loc_div.find('span'))
+
+        return header
+
+
+class SelectolaxBackend:
+    """selectolax (lexbor) backend using CSS selectors."""
+
+    name = 'selectolax'
+
+    def _text(self, node):
+        # Same result as BeautifulSoup's get_text(strip=True)
+        if node is None:
+            return None
+        return ''.join(child.text_content.strip() for child in node.traverse(include_text=True) if child.tag == '-text')
+
+    def calendar_links(self, content):
+        """Return (href, text) for every <a href> on the page."""
+        tree = LexborHTMLParser(content)
+        return [(link.attributes.get('href') or '', self._text(link)) for link in tree.css('a[href]')]
+
+    def event_header(self, content):
+        """
+        Return the raw header texts of an event page as a dict with
+        HEADER_FIELDS keys; a key is None when its element is missing.
+        """
+        tree = LexborHTMLParser(content)
+        header = dict.fromkeys(HEADER_FIELDS)
+
+        header_details = tree.css_first('div[class="headerdetails datey"]')
+        header_date = header_details.css_first('div.headerdate') if header_details else None
+        if header_date:
+            header['date_text'] = self._text(header_date.css_first('h3'))
+            header['time_text'] = self._text(header_date.css_first('span'))
+
+        header_loc = tree.css_first('div[class="headerdetails locy"]')
+        header_loc_div = header_loc.css_first('div.headerloc') if header_loc else None
+        if header_loc_div:
+            header['venue_text'] = self._text(header_loc_div.css_first('h3'))
+            header['address_text'] = self._text(header_loc_div.css_first('span'))
+
+        return header
+
+
+class CalendarLinkParser(HTMLParser):
+    """
+    Incremental tokenizer for the calendar page.
+    Feed it decoded chunks as they arrive; every <a href> is available from
+    pop_links() as (href, text) as soon as its closing tag has been seen.
+    Text is joined the same way as BeautifulSoup's get_text(strip=True).
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self._links = []
+        self._href = None
+        # Stripped text nodes of the current link, and the raw pieces of the
+        # text node being read (HTMLParser splits a node at chunk boundaries)
+        self._text = []
+        self._pieces = []
+
+    def handle_starttag(self, tag, attrs):
+        self._finish_text()
+        if tag != 'a':
+            return
+        self._finish_link()
+        for name, value in attrs:
+            if name == 'href':
+                self._href = value or ''
+
+    def handle_endtag(self, tag):
+        self._finish_text()
+        if tag == 'a':
+            self._finish_link()
+
+    def handle_comment(self, data):
+        self._finish_text()
+
+    def handle_data(self, data):
+        if self._href is not None:
+            self._pieces.append(data)
+
+    def close(self):
+        super().close()
+        self._finish_link()
+
+    def _finish_text(self):
+        """Strip the text node read so far as a whole, like get_text(strip=True) does."""
+        if self._pieces:
+            self._text.append(''.join(self._pieces).strip())
+            self._pieces = []
+
+    def _finish_link(self):
+        self._finish_text()
+        if self._href is not None:
+            self._links.append((self._href, ''.join(self._text)))
+        self._href = None
+        self._text = []
+
+    def pop_links(self):
+        """Return the links completed since the last call."""
+        links, self._links = self._links, []
+        return links
+
+
+def available_backends():
+    """Return the names of all usable backends, fastest first."""
+    names = []
+    if LexborHTMLParser is not None:
+        names.append('selectolax')
+    if HAS_LXML:
+        names.append('lxml')
+    names.append('html.parser')
+    return names
+
+
+def get_backend(name=None, partial=True):
+    """
+    Return the backend called name, or the fastest available one.
+    partial=False makes BeautifulSoup backends build the full document tree.
+    """
+    name = name or available_backends()[0]
+    if name not in available_backends():
+        raise ValueError(f"Parser backend not available: {name}")
+    if name == 'selectolax':
+        return SelectolaxBackend()
+    return SoupBackend(name, partial=partial)
+
+
+DEFAULT_BACKEND = get_backend()
@@ -0,0 +1,114 @@
+import asyncio
+
+from http_cache import HTTPCache, HTTP_CACHE_FILE
+from http_client import MAX_CONNECTIONS, PER_HOST_LIMIT
+from scraper import create_client, extract_event_details_async, iter_calendar_events
+
+QUEUE_SIZE = 32            # Max items waiting between two pipeline stages
+
+# Marks the end of a queue's stream of items
+DONE = object()
+
+
+async def discover_links(client, cache, links, workers):
+    """Producer: stream calendar links, tagged with their calendar position, into the links queue."""
+    count = 0
+    async for event in iter_calendar_events(client, cache):
+        count += 1
+        print(f"Discovered {count}: {event['city']} ({event['url']})")
+        await links.put((count - 1, event))
+
+    print(f"Found {count} event links")
+    for _ in range(workers):
+        await links.put(DONE)
+
+
+async def fetch_details(client, cache, links, results):
+    """
+    Worker: fetch event pages for queued links and pass on the scraped
+    EventRecords as (calendar position, record). Links that could not be
+    scraped are passed on as (position, None) so the merge stage can keep
+    calendar order.
+    """
+    while True:
+        item = await links.get()
+        if item is DONE:
+            await results.put(DONE)
+            return
+
+        index, event = item
+
+        try:
+            details = await extract_event_details_async(client, event['url'], cache)
+        except Exception as e:
+            print(f"Error scraping {event['url']}: {e}")
+            details = None
+
+        if details and details.date:
+            details.city = event['city']
+        else:
+            print(f"  - Warning: Could not extract details for {event['city']}")
+            details = None
+        await results.put((index, details))
+
+
+async def merge_events(manager, results, workers):
+    """
+    Consumer: merge scraped events into the EventManager in calendar order.
+    Results that arrive ahead of an earlier link still being fetched wait
+    in a reorder buffer, so the stored order (and which record wins when
+    two links map to the same event ID) does not depend on fetch timing.
+    """
+    scraped = 0
+    changed_ids = []
+    finished = 0
+    pending = {}
+    next_index = 0
+
+    while finished < workers:
+        item = await results.get()
+        if item is DONE:
+            finished += 1
+            continue
+
+        index, event = item
+        pending[index] = event
+        while next_index in pending:
+            event = pending.pop(next_index)
+            next_index += 1
+            if event is None:
+                continue
+
+            scraped += 1
+            event_id = manager.merge_event(event)
+            if event_id:
+                changed_ids.append(event_id)
+
+    return scraped, changed_ids
+
+
+async def run_pipeline(manager, max_workers=MAX_CONNECTIONS, per_host_limit=PER_HOST_LIMIT,
+                       cache_file=HTTP_CACHE_FILE, queue_size=QUEUE_SIZE):
+    """
+    Scrape events and merge them into manager as one pipeline:
+    calendar link discovery -> `max_workers` detail fetch workers ->
+    event store merge, connected by bounded queues so every stage runs
+    concurrently and memory stays bounded.
+    Returns (number of events scraped, list of changed event IDs).
+    """
+    cache = HTTPCache(cache_file) if cache_file else None
+    links = asyncio.Queue(maxsize=queue_size)
+    results = asyncio.Queue(maxsize=queue_size)
+
+    async with create_client(max_workers, per_host_limit) as client:
+        stages = await asyncio.gather(
+            merge_events(manager, results, max_workers),
+            discover_links(client, cache, links, max_workers),
+            *(fetch_details(client, cache, links, results) for _ in range(max_workers)),
+        )
+        scraped, changed_ids = stages[0]
+
+    if cache:
+        cache.save()
+
+    return scraped, changed_ids
@@ -0,0 +1,120 @@
+import asyncio
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+from fetch_policy import DeadlineExceededError
+
+# Rate limiter settings (requests per second, per host)
+INITIAL_RATE = 1.0         # Starting rate for a host we have not seen yet
+MIN_RATE = 0.1             # Never slow down below this
+MAX_RATE = 10.0            # Never speed up beyond this
+BURST = 2                  # Tokens a bucket can hold (max back-to-back requests)
+TARGET_LATENCY = 2.0       # Responses slower than this count as server pressure
+INCREASE_STEP = 0.5        # Additive increase after a fast, successful response
+SLOW_FACTOR = 0.75         # Multiplicative decrease after a slow response
+ERROR_FACTOR = 0.5         # Multiplicative decrease after 429/503 or a network error
+
+THROTTLE_STATUSES = {429, 503}
+
+
+def parse_retry_after(value):
+    """
+    Parse a Retry-After header (delta-seconds or HTTP-date).
+    Returns the number of seconds to wait, or None if missing/invalid.
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class TokenBucket:
+    """Token bucket for a single host; tokens refill at `rate` per second."""
+
+    def __init__(self, rate=INITIAL_RATE, capacity=BURST):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def reserve(self, now):
+        """Take one token and return how many seconds to wait before using it."""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= 1
+        wait = 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+        return max(wait, self.blocked_until - now)
+
+
+class RateLimiter:
+    """
+    Adaptive per-host rate limiter.
+    Each host gets its own token bucket. The bucket rate grows additively
+    while responses are fast and successful, and shrinks multiplicatively
+    on slow responses, errors and 429/503 answers. Retry-After pauses the
+    host for the requested time.
+    """
+
+    def __init__(self, rate=INITIAL_RATE, min_rate=MIN_RATE, max_rate=MAX_RATE,
+                 burst=BURST, target_latency=TARGET_LATENCY):
+        self.initial_rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.burst = burst
+        self.target_latency = target_latency
+        self._buckets = {}
+
+    def bucket(self, host):
+        """Return the token bucket for host, creating it on first use."""
+        if host not in self._buckets:
+            self._buckets[host] = TokenBucket(self.initial_rate, self.burst)
+        return self._buckets[host]
+
+    async def acquire(self, host, deadline=None):
+        """
+        Wait until a request to host is allowed. Raises DeadlineExceededError
+        instead of waiting past `deadline` (a time.monotonic() value).
+        """
+        bucket = self.bucket(host)
+        now = time.monotonic()
+        wait = bucket.reserve(now)
+        if deadline is not None and now + wait >= deadline:
+            bucket.tokens += 1  # Give back the unused token
+            raise DeadlineExceededError(f"{host} asks to wait {wait:.0f}s, past the request deadline")
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def paused_for(self, host):
+        """Seconds left of host's Retry-After pause (0 if it is not paused)."""
+        return max(0.0, self.bucket(host).blocked_until - time.monotonic())
+
+    def record(self, host, status=None, latency=None, retry_after=None):
+        """
+        Feed back the outcome of a request to host.
+        status is the HTTP status (None for a network error or timeout),
+        latency the response time in seconds, retry_after the parsed
+        Retry-After delay in seconds.
+        """
+        bucket = self.bucket(host)
+
+        if retry_after is not None:
+            bucket.blocked_until = max(bucket.blocked_until, time.monotonic() + retry_after)
+
+        if status is None or status in THROTTLE_STATUSES or status >= 500:
+            bucket.rate *= ERROR_FACTOR
+        elif latency is not None and latency > self.target_latency:
+            bucket.rate *= SLOW_FACTOR
+        elif status < 400:
+            bucket.rate += INCREASE_STEP
+
+        bucket.rate = min(self.max_rate, max(self.min_rate, bucket.rate))
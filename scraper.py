@@ -1,9 +1,19 @@
-import requests
-from bs4 import BeautifulSoup
-from datetime import datetime
+import asyncio
+import codecs
+from datetime import date, datetime, time
+import hashlib
 import re
-import time
-from urllib.parse import urlparse
+from event_record import DEFAULT_TIME, EventRecord
+from http_cache import HTTPCache, HTTP_CACHE_FILE, content_digest
+from http_client import AsyncHTTPClient, FETCH_ERRORS, MAX_CONNECTIONS, PER_HOST_LIMIT
+from parser_backends import DEFAULT_BACKEND, CalendarLinkParser
+
+CALENDAR_URL = "https://www.measurecamp.org/measurecamp-calendar/"
+STREAM_CHUNK_SIZE = 16 * 1024  # Bytes fed to the calendar tokenizer at a time
+
+# Month abbreviations used on event pages ("Saturday 17 Jan 2026") -> month number
+MONTHS = {name: number for number, name in enumerate(
+    ('jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec'), start=1)}
 
 # Headers to mimic a browser request
 BROWSER_HEADERS = {
@@ -16,184 +26,329 @@ BROWSER_HEADERS = {
     'Upgrade-Insecure-Requests': '1'
 }
 
-def get_calendar_events():
+
+def create_client(max_workers=MAX_CONNECTIONS, per_host_limit=PER_HOST_LIMIT):
+    """Create the shared HTTP client used for a scraping run."""
+    return AsyncHTTPClient(
+        headers=BROWSER_HEADERS,
+        max_connections=max_workers,
+        per_host_limit=per_host_limit,
+    )
+
+
+def parse_calendar_page(content, backend=None):
+    """
+    Extract all event links from the calendar page HTML.
+    `backend` is a parser_backends backend (default: fastest available).
+    Returns a list of dicts: {city, url, raw_text}
+    """
+    backend = backend or DEFAULT_BACKEND
+
+    # Find the pagecontents div and extract event links
+    events = []
+
+    # Look for all links that point to event subdomains
+    for href, text in backend.calendar_links(content):
+        event = calendar_link_to_event(href, text)
+        if event:
+            events.append(event)
+
+    return events
+
+
+def calendar_link_to_event(href, text):
+    """
+    Turn one calendar page link into an event record {city, url, raw_text}.
+    Returns None for links that are not event subdomains.
+    """
+    # Match measurecamp subdomains (e.g., amsterdam.measurecamp.org)
+    if 'measurecamp.org' not in href or href.startswith('https://www.measurecamp.org'):
+        return None
+
+    # Parse format like "17th Jan – Malmo" or "17th Jan – Malmo (note)"
+    match = re.search(r'–\s*(.+?)(?:\s*\(|$)', text)
+    if not match:
+        return None
+
+    return {
+        'city': match.group(1).strip(),
+        'url': href if href.startswith('http') else 'https:' + href if href.startswith('//') else 'https://' + href,
+        'raw_text': text
+    }
+
+
+async def get_calendar_events_async(client, cache=None):
     """
     Fetch the main calendar page and extract all event links.
-    Returns a list of tuples: (city_name, event_url)
+    With an HTTPCache the request is conditional, and an unchanged page
+    (304 or identical body) reuses the previously extracted links.
+    Returns a list of dicts: {city, url, raw_text}
     """
-    calendar_url = "https://www.measurecamp.org/measurecamp-calendar/"
+    headers = cache.conditional_headers(CALENDAR_URL) if cache else None
 
     try:
-        response = requests.get(calendar_url, headers=BROWSER_HEADERS, timeout=10)
-        response.raise_for_status()
-    except requests.RequestException as e:
+        response = await client.get(CALENDAR_URL, headers=headers)
+    except FETCH_ERRORS as e:
         print(f"Error fetching calendar page: {e}")
         return []
 
-    soup = BeautifulSoup(response.content, 'html.parser')
+    if response.status == 304:
+        print("Calendar page not modified, reusing cached links")
+        return cache.get(CALENDAR_URL)
 
-    # Find the pagecontents div and extract event links
+    if not cache:
+        return parse_calendar_page(response.content)
+
+    digest = content_digest(response.content)
+    events = cache.get(CALENDAR_URL, digest)
+    if events is None:
+        events = parse_calendar_page(response.content)
+    cache.store(CALENDAR_URL, response, events, digest)
+    return events
+
+
+async def iter_calendar_events(client, cache=None):
+    """
+    Stream the calendar page and yield {city, url, raw_text} records as
+    soon as each event link has been read, while the rest of the page is
+    still downloading. With an HTTPCache the request is conditional, and
+    an unchanged page yields the previously extracted links.
+    """
+    headers = cache.conditional_headers(CALENDAR_URL) if cache else None
     events = []
 
-    # Look for all links that point to event subdomains
-    for link in soup.find_all('a', href=True):
-        href = link['href']
-
-        # Match measurecamp subdomains (e.g., amsterdam.measurecamp.org)
-        if 'measurecamp.org' in href and not href.startswith('https://www.measurecamp.org'):
-            # Extract city name from text
-            text = link.get_text(strip=True)
-
-            # Parse format like "17th Jan – Malmo" or "17th Jan – Malmo (note)"
-            match = re.search(r'–\s*(.+?)(?:\s*\(|$)', text)
-            if match:
-                city = match.group(1).strip()
-                events.append({
-                    'city': city,
-                    'url': href if href.startswith('http') else 'https:' + href if href.startswith('//') else 'https://' + href,
-                    'raw_text': text
-                })
+    try:
+        async with client.stream(CALENDAR_URL, headers=headers) as response:
+            if response.status == 304:
+                print("Calendar page not modified, reusing cached links")
+                for event in cache.get(CALENDAR_URL):
+                    yield event
+                return
 
-    return events
+            decoder = codecs.getincrementaldecoder(response.charset or 'utf-8')(errors='replace')
+            parser = CalendarLinkParser()
+            digest = hashlib.sha256()
 
+            async for chunk in response.content.iter_chunked(STREAM_CHUNK_SIZE):
+                digest.update(chunk)
+                parser.feed(decoder.decode(chunk))
+                for href, text in parser.pop_links():
+                    event = calendar_link_to_event(href, text)
+                    if event:
+                        events.append(event)
+                        yield event
 
-def extract_event_details(event_url):
+            parser.feed(decoder.decode(b'', final=True))
+            parser.close()
+            for href, text in parser.pop_links():
+                event = calendar_link_to_event(href, text)
+                if event:
+                    events.append(event)
+                    yield event
+    except FETCH_ERRORS as e:
+        print(f"Error fetching calendar page: {e}")
+        return
+
+    if cache:
+        cache.store(CALENDAR_URL, response, events, digest.hexdigest())
+
+
+def get_calendar_events():
     """
-    Fetch an individual event page and extract:
-    - Date (parsed into YYYY-MM-DD format)
-    - Time (HH:MM format)
+    Fetch the main calendar page and extract all event links.
+    Returns a list of dicts: {city, url, raw_text}
+    """
+    async def run():
+        async with create_client() as client:
+            return await get_calendar_events_async(client)
+
+    return asyncio.run(run())
+
+
+def parse_event_details(content, event_url, backend=None):
+    """
+    Extract from an individual event page's HTML:
+    - Date (parsed into a datetime.date)
+    - Time (parsed into a datetime.time)
     - Venue name
     - Full address
+    `backend` is a parser_backends backend (default: fastest available).
+    Returns an EventRecord with url, date, time, venue and address set.
+    """
+    backend = backend or DEFAULT_BACKEND
+
+    parsed_date = None
+    parsed_time = None
+    address_str = None
+
+    # Structured header texts from "headerdetails datey" and "headerdetails locy"
+    header = backend.event_header(content)
+
+    if header['date_text']:
+        # Extract date from h3 text (e.g., "Saturday 14 Jun, 2025")
+        date_match = re.search(r'(Monday|Tuesday|Wednesday|Thursday|Friday|Saturday|Sunday)\s+(\d{1,2})\s+(\w+),?\s*(\d{4})?', header['date_text'])
+        if date_match:
+            day_name, day, month, year = date_match.groups()
+            parsed_date = build_event_date(day, month, year)
+
+    # Time info might be in span (e.g., "- 8h30 - 17h00 + after")
+    # We'll treat as all-day event if time is not clearly specified
+    if header['time_text']:
+        # Try to extract specific time patterns (e.g., "09:00" or "8h30")
+        time_match = re.search(r'(\d{1,2}):(\d{2})', header['time_text'])
+        if time_match:
+            try:
+                parsed_time = time(int(time_match.group(1)), int(time_match.group(2)))
+            except ValueError:
+                pass
+
+    # Venue name is the h3 text within headerloc div
+    venue_str = header['venue_text']
+
+    # Address is in span, need to remove the link text
+    if header['address_text'] is not None:
+        # Remove link text like "Localisation", "Map", etc.
+        address_str = re.sub(r'\s*\(?(?:Localisation|Localiser|View the venue|Maps?|Localizer).*$', '', header['address_text'], flags=re.IGNORECASE).strip()
+
+    return EventRecord(
+        url=event_url,
+        date=parsed_date,
+        time=parsed_time or DEFAULT_TIME,  # Default to 9 AM if not found
+        venue=venue_str,
+        address=address_str,
+    )
+
+
+def build_event_date(day, month, year=None, today=None):
+    """
+    Build the date of an event page from its matched day, month abbreviation
+    and optional year (e.g. "17", "Jan", "2026"), or return None.
+    Without a year: if the month is before the current month, use next year;
+    else use the current year.
     """
+    month_number = MONTHS.get(month.lower())
+    if month_number is None:
+        print(f"Could not parse date '{day} {month}': unknown month")
+        return None
+
+    if year is None:
+        today = today or datetime.now()
+        year = today.year + 1 if month_number < today.month else today.year
+
     try:
-        response = requests.get(event_url, headers=BROWSER_HEADERS, timeout=10)
-        response.raise_for_status()
-    except requests.RequestException as e:
-        print(f"Error fetching event page {event_url}: {e}")
+        return date(int(year), month_number, int(day))
+    except ValueError as e:
+        print(f"Could not parse date '{day} {month} {year}': {e}")
         return None
 
-    soup = BeautifulSoup(response.content, 'html.parser')
 
-    details = {
-        'url': event_url,
-        'date': None,
-        'time': None,
-        'venue': None,
-        'address': None
-    }
+async def extract_event_details_async(client, event_url, cache=None):
+    """
+    Fetch an individual event page and parse its details into an
+    EventRecord (None on failure). With an HTTPCache the request is
+    conditional, and an unchanged page (304 or identical body) reuses the
+    previously parsed details.
+    """
+    headers = cache.conditional_headers(event_url) if cache else None
 
-    date_str = None
-    time_str = None
-    venue_str = None
-    address_str = None
+    try:
+        response = await client.get(event_url, headers=headers)
+    except FETCH_ERRORS as e:
+        print(f"Error fetching event page {event_url}: {e}")
+        return None
 
-    # First, look for the structured header with date in class="headerdetails datey"
-    header_details = soup.find('div', class_='headerdetails datey')
-    if header_details:
-        # Date is in h3 within headerdate div
-        header_date = header_details.find('div', class_='headerdate')
-        if header_date:
-            h3 = header_date.find('h3')
-            if h3:
-                # Extract date from h3 text (e.g., "Saturday 14 Jun, 2025")
-                text = h3.get_text(strip=True)
-                # Remove icon text if present
-                text = re.sub(r'<i.*?</i>', '', text)
-                text = h3.get_text(strip=True)
-                date_match = re.search(r'(Monday|Tuesday|Wednesday|Thursday|Friday|Saturday|Sunday)\s+(\d{1,2})\s+(\w+),?\s*(\d{4})?', text)
-                if date_match:
-                    day_name, day, month, year = date_match.groups()
-                    date_str = f"{day_name} {day} {month}" + (f" {year}" if year else "")
-
-            # Time info might be in span (e.g., "- 8h30 - 17h00 + after")
-            # We'll treat as all-day event if time is not clearly specified
-            span = header_date.find('span')
-            if span:
-                span_text = span.get_text(strip=True)
-                # Try to extract specific time patterns (e.g., "09:00" or "8h30")
-                time_match = re.search(r'(\d{1,2}):(\d{2})', span_text)
-                if time_match:
-                    time_str = f"{time_match.group(1)}:{time_match.group(2)}"
-
-    # Look for venue and address in structured "headerdetails locy" container
-    header_loc = soup.find('div', class_='headerdetails locy')
-    if header_loc:
-        # Venue name is in h3 within headerloc div
-        header_loc_div = header_loc.find('div', class_='headerloc')
-        if header_loc_div:
-            h3 = header_loc_div.find('h3')
-            if h3:
-                # Get text from h3, excluding icon
-                venue_str = h3.get_text(strip=True)
-
-            # Address is in span, need to remove the link text
-            span = header_loc_div.find('span')
-            if span:
-                span_text = span.get_text(strip=True)
-                # Remove link text like "Localisation", "Map", etc.
-                address_str = re.sub(r'\s*\(?(?:Localisation|Localiser|View the venue|Maps?|Localizer).*$', '', span_text, flags=re.IGNORECASE).strip()
-
-    # Parse date to YYYY-MM-DD format
-    parsed_date = None
-    if date_str:
-        try:
-            # Try parsing with year (format: "Saturday 17 Jan 2026")
-            dt = datetime.strptime(date_str, "%A %d %b %Y")
-            parsed_date = dt.strftime("%Y-%m-%d")
-        except ValueError:
-            try:
-                # Try parsing without year (format: "Saturday 17 Jan")
-                dt = datetime.strptime(date_str, "%A %d %b")
-                # Infer year: if month is before current month, use next year; else use current year
-                today = datetime.now()
-                year = today.year
-                if dt.month < today.month:
-                    year += 1
-                dt = dt.replace(year=year)
-                parsed_date = dt.strftime("%Y-%m-%d")
-            except ValueError as e:
-                print(f"Could not parse date '{date_str}': {e}")
-
-    details['date'] = parsed_date
-    details['time'] = time_str or "09:00"  # Default to 9 AM if not found
-    details['venue'] = venue_str
-    details['address'] = address_str
+    if response.status == 304:
+        return EventRecord.from_dict(cache.get(event_url))
+
+    if not cache:
+        return parse_event_details(response.content, event_url)
 
+    digest = content_digest(response.content)
+    cached = cache.get(event_url, digest)
+    if cached is None:
+        details = parse_event_details(response.content, event_url)
+    else:
+        details = EventRecord.from_dict(cached)
+    cache.store(event_url, response, details.to_dict(), digest)
     return details
 
 
-def scrape_all_events():
+def extract_event_details(event_url):
     """
-    Main scraping function: get calendar events, then fetch details for each.
-    Returns a list of event dictionaries.
+    Fetch an individual event page and extract:
+    - Date (parsed into a datetime.date)
+    - Time (parsed into a datetime.time)
+    - Venue name
+    - Full address
     """
-    print("Fetching calendar page...")
-    calendar_events = get_calendar_events()
-    print(f"Found {len(calendar_events)} event links")
+    async def run():
+        async with create_client() as client:
+            return await extract_event_details_async(client, event_url)
+
+    return asyncio.run(run())
+
+
+async def scrape_all_events_async(max_workers=MAX_CONNECTIONS, per_host_limit=PER_HOST_LIMIT,
+                                  cache_file=HTTP_CACHE_FILE):
+    """
+    Main scraping function: stream the calendar events and fetch the details
+    of each one as soon as its link is seen.
+    All requests share one connection pool; event pages are fetched
+    concurrently with at most `max_workers` requests in flight overall
+    and `per_host_limit` per host, paced by the client's adaptive per-host
+    rate limiter. Validators are kept in `cache_file`
+    (None disables it) so unchanged pages are not downloaded again.
+    Returns a list of EventRecords (in calendar order).
+    """
+    cache = HTTPCache(cache_file) if cache_file else None
+
+    async with create_client(max_workers, per_host_limit) as client:
+        print("Fetching calendar page...")
+        calendar_events = []
+        tasks = []
+
+        # Start fetching each event page as soon as its link is streamed in
+        async for event in iter_calendar_events(client, cache):
+            calendar_events.append(event)
+            print(f"Scraping {len(calendar_events)}: {event['city']} ({event['url']})")
+            tasks.append(asyncio.create_task(extract_event_details_async(client, event['url'], cache)))
+
+        print(f"Found {len(calendar_events)} event links")
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+
+    if cache:
+        cache.save()
 
     all_events = []
 
-    for i, event in enumerate(calendar_events):
-        print(f"Scraping {i+1}/{len(calendar_events)}: {event['city']} ({event['url']})")
+    for event, details in zip(calendar_events, results):
+        if isinstance(details, Exception):
+            print(f"Error scraping {event['url']}: {details}")
+            details = None
 
-        details = extract_event_details(event['url'])
-        if details and details['date']:
-            event.update(details)
-            all_events.append(event)
+        if details and details.date:
+            details.city = event['city']
+            all_events.append(details)
         else:
             print(f"  - Warning: Could not extract details for {event['city']}")
 
-        # Rate limiting - be respectful to the server
-        time.sleep(1)
-
     return all_events
 
 
+def scrape_all_events(max_workers=MAX_CONNECTIONS, per_host_limit=PER_HOST_LIMIT,
+                      cache_file=HTTP_CACHE_FILE):
+    """
+    Synchronous wrapper around scrape_all_events_async.
+    Returns a list of EventRecords (in calendar order).
+    """
+    return asyncio.run(scrape_all_events_async(max_workers, per_host_limit, cache_file))
+
+
 if __name__ == "__main__":
     events = scrape_all_events()
     for event in events:
-        print(f"\n{event['city']}:")
-        print(f"  Date: {event['date']}")
-        print(f"  Time: {event['time']}")
-        print(f"  Venue: {event['venue']}")
-        print(f"  Address: {event['address']}")
+        print(f"\n{event.city}:")
+        print(f"  Date: {event.date_str}")
+        print(f"  Time: {event.time_str}")
+        print(f"  Venue: {event.venue}")
+        print(f"  Address: {event.address}")